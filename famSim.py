@@ -1,5 +1,11 @@
+import os
 import random
 import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from triple_export import SINKS, export_triples
 
 def create_family_json(person):
     family_dict = {
@@ -59,6 +65,8 @@ def print_family(person):
             print("   Child", child.name) 
     
 def count_alive(a): 
+  if not isinstance(a, list):
+    return a.count_alive()
   mysum = 0 
   for person in a: 
     if person.alive: 
@@ -66,26 +74,173 @@ def count_alive(a):
   return mysum
 
 
+def _merge(relatives, people):
+    # Add people to an ordered-set relation in order; return the newcomers.
+    added = [q for q in dict.fromkeys(people) if q not in relatives]
+    relatives.update(dict.fromkeys(added))
+    return added
+
+
+def _derived_relation(rel):
+    # Read-only attribute for a derived relation, worked out on first access.
+    def getter(self):
+        kinship = self._kinship
+        if kinship is None:
+            kinship = self._kinship = {}
+        if rel not in kinship:
+            kinship.update(self._with_explicit(getattr(self, "_derive_" + _DERIVED_GROUPS[rel])()))
+        return kinship[rel]
+    return property(getter)
+
+# relation -> the _derive_* method that computes it (alongside its pair)
+_DERIVED_GROUPS = {"grandfather": "grandparents", "grandmother": "grandparents",
+                   "siblings": "siblings", "cousins": "cousins",
+                   "uncles": "aunts_uncles", "aunts": "aunts_uncles",
+                   "nephews": "nieces_nephews", "nieces": "nieces_nephews"}
+
+
+def _forget_kinship(parent, child):
+    # Drop the memos that read the parent -> child link: the child's and
+    # its siblings' (siblings, nieces/nephews), its children's and the
+    # parent's other grandchildren's (grandparents, aunts/uncles, cousins),
+    # and the parent's siblings' and their children's (nieces/nephews,
+    # cousins).  Nobody else's relations pass through the link.
+    stale = [child]
+    stale.extend(child.children)
+    if isinstance(parent, Person):
+        for c in parent.children:
+            stale.append(c)
+            stale.extend(c.children)
+        for g in parent._parents():
+            for s in g.children:
+                stale.append(s)
+                stale.extend(s.children)
+    for person in stale:
+        person._kinship = None
+
+
 class Person:
+    # Derived relations (grandparents, siblings, cousins, aunts/uncles,
+    # nieces/nephews) are computed from parents and children the first time
+    # they are read and memoized per person.  Changing a parent or adding a
+    # child drops the memos of the people whose relations go through that
+    # link (see _forget_kinship), and only theirs.
+    # Relatives are ordered as the fill_* passes would list them, taking
+    # people in name order (famSim assigns names in birth order).
+    # siblings, cousins, uncles, aunts, nephews and nieces are
+    # insertion-ordered sets (dicts whose keys are the relatives), not the
+    # lists they once were, so add_* deduplicates in O(1); use list(...)
+    # where a list is needed.  grandfather and grandmother stay lists.
+    # Relatives given explicitly with add_* are kept apart as well, and
+    # appended again whenever a memo is recomputed.
+
     def __init__(self, name, gender, year=0):
         self.name = name
         self.gender = gender
         self.spouse = None
-        self.father = random.random()
-        self.mother = random.random()
-        self.grandmother = [] 
-        self.grandfather = [] 
+        self._father = random.random()
+        self._mother = random.random()
         self.children = []
-        self.siblings = []
-        self.cousins = []
-        self.uncles = []
-        self.aunts = []
-        self.nephews = []
-        self.nieces = []
+        self._kinship = None
+        self._explicit = None
         self.birthyear = year
         self.deathyear = None
         self.alive = True
 
+    @property
+    def father(self):
+        return self._father
+
+    @father.setter
+    def father(self, father):
+        _forget_kinship(self._father, self)
+        self._father = father
+        _forget_kinship(father, self)
+
+    @property
+    def mother(self):
+        return self._mother
+
+    @mother.setter
+    def mother(self, mother):
+        _forget_kinship(self._mother, self)
+        self._mother = mother
+        _forget_kinship(mother, self)
+
+    grandfather = _derived_relation("grandfather")
+    grandmother = _derived_relation("grandmother")
+    siblings = _derived_relation("siblings")
+    cousins = _derived_relation("cousins")
+    uncles = _derived_relation("uncles")
+    aunts = _derived_relation("aunts")
+    nephews = _derived_relation("nephews")
+    nieces = _derived_relation("nieces")
+
+    def _parents(self):
+        # Founders' parents are random placeholders, not people.
+        parents = [q for q in (self._father, self._mother) if isinstance(q, Person)]
+        parents.sort(key=lambda q: q.name)
+        return parents
+
+    def _grandparents(self):
+        return sorted(((g, q) for q in self._parents() for g in q._parents()),
+                      key=lambda gq: gq[0].name)
+
+    def _derive_grandparents(self):
+        grandparents = [g for g, _ in self._grandparents()]
+        return {"grandfather": [g for g in grandparents if g.gender != "female"],
+                "grandmother": [g for g in grandparents if g.gender == "female"]}
+
+    def _derive_siblings(self):
+        return {"siblings": dict.fromkeys(c for q in self._parents() for c in q.children if c is not self)}
+
+    def _derive_cousins(self):
+        return {"cousins": dict.fromkeys(cousin
+            for grand_person, parent in self._grandparents()
+            for sibling_parent in grand_person.children if sibling_parent != parent
+            for cousin in sibling_parent.children)}
+
+    def _derive_aunts_uncles(self):
+        uncles, aunts = _split_by_gender(s for q in self._parents() for s in q.siblings)
+        return {"uncles": dict.fromkeys(uncles), "aunts": dict.fromkeys(aunts)}
+
+    def _derive_nieces_nephews(self):
+        nephews, nieces = _split_by_gender(
+            c for s in sorted(self.siblings, key=lambda s: s.name) for c in s.children)
+        return {"nephews": dict.fromkeys(nephews), "nieces": dict.fromkeys(nieces)}
+
+    def _with_explicit(self, derived):
+        # Append the explicit add_* entries to freshly derived relations.
+        if self._explicit:
+            for rel, relatives in derived.items():
+                extra = self._explicit.get(rel)
+                if not extra:
+                    continue
+                if isinstance(relatives, list):
+                    relatives.extend(q for q in extra if q not in relatives)
+                else:
+                    relatives.update(extra)
+        return derived
+
+    def _set_kinship(self, kinship):
+        # Install relations worked out elsewhere (fill_kinship) as the memo.
+        self._kinship = self._with_explicit(kinship)
+
+    def _add(self, rel, people):
+        # Merge people into relation rel and remember the newcomers as
+        # explicit entries; return the newcomers.
+        relatives = getattr(self, rel)
+        if isinstance(relatives, list):
+            added = [q for q in dict.fromkeys(people) if q not in relatives]
+            relatives.extend(added)
+        else:
+            added = _merge(relatives, people)
+        if added:
+            if self._explicit is None:
+                self._explicit = {}
+            self._explicit.setdefault(rel, {}).update(dict.fromkeys(added))
+        return added
+
     def marry(self, spouse):
         if self.spouse == None:
            self.spouse = spouse
@@ -93,32 +248,54 @@ class Person:
 
     def add_child(self, child):
         self.children.append(child)
+        _forget_kinship(self, child)
 
     def add_sibling(self, sibling):
-        if sibling not in self.siblings:
-            self.siblings.append(sibling)
+        if self._add("siblings", (sibling,)):
             sibling.add_sibling(self)
 
+    # Bulk adds merge a whole group at once and keep its order.  Like
+    # add_sibling and add_cousin, add_siblings and add_cousins are two-way:
+    # everyone newly added gets self back, without a recursive call per pair.
+    def add_siblings(self, siblings):
+        # The group may include self.
+        for sibling in self._add("siblings", (s for s in siblings if s != self)):
+            sibling._add("siblings", (self,))
+
     def add_cousin(self, cousin):
-        if cousin not in self.cousins:
-            self.cousins.append(cousin)
+        if self._add("cousins", (cousin,)):
             cousin.add_cousin(self)
 
+    def add_cousins(self, cousins):
+        for cousin in self._add("cousins", cousins):
+            cousin._add("cousins", (self,))
+
     def add_uncle(self, uncle):
-        if uncle not in self.uncles:
-            self.uncles.append(uncle)
+        self._add("uncles", (uncle,))
+
+    def add_uncles(self, uncles):
+        self._add("uncles", uncles)
 
     def add_aunt(self, aunt):
-        if aunt not in self.aunts:
-            self.aunts.append(aunt)
+        self._add("aunts", (aunt,))
+
+    def add_aunts(self, aunts):
+        self._add("aunts", aunts)
 
     def add_nephew(self, nephew):
-        if nephew not in self.nephews:
-            self.nephews.append(nephew)
+        self._add("nephews", (nephew,))
+
+    def add_nephews(self, nephews):
+        self._add("nephews", nephews)
 
     def add_niece(self, niece):
-        if niece not in self.nieces:
-            self.nieces.append(niece)
+        self._add("nieces", (niece,))
+
+    def add_nieces(self, nieces):
+        self._add("nieces", nieces)
+
+    def add_grandparent(self, grandparent):
+        self._add("grandmother" if grandparent.gender == "female" else "grandfather", (grandparent,))
 
     def age(self,t):
         return t - self.birthyear
@@ -148,15 +325,21 @@ class Person:
 #    def age(self,t):
 #        return t - self.birthyear
 
+def fill_grandparent_relationships(p):
+    # grandparents are the parents of a child's parents, so start
+    # from grandparents and drill down two levels.
+    for person in p:
+        for c in person.children:
+            for cc in c.children:
+                cc.add_grandparent(person)
+
 def fill_sibling_relationships(p):
     # siblings have a common parent, so start from parents 
     # and drill down one level.  Double loop over all children
     # but don't count a person as their own sibling.
     for person in p:
         for child in person.children:
-            for sibling in person.children:
-                if child != sibling:
-                    child.add_sibling(sibling)
+            child.add_siblings(person.children)
 
 def fill_cousin_relationships(p):
     # cousins have common grandparents, but not common parents.
@@ -167,8 +350,7 @@ def fill_cousin_relationships(p):
             for sibling_parent in grand_person.children:
                 if parent != sibling_parent:
                     for target_child in parent.children:
-                        for cousin in sibling_parent.children:
-                            target_child.add_cousin(cousin)
+                        target_child.add_cousins(sibling_parent.children)
 
 def fill_aunt_or_uncle_relationship(p):
     # aunt_uncle is a sibling of child's parent
@@ -194,12 +376,89 @@ def fill_niece_or_nephew_relationship(p):
                else:
                    print("Gender error")
 
+def add_person(p, name, gender, year=0):
+   # p is either a list of Person objects or a population_store.PopulationStore
+   if isinstance(p, list):
+      person = Person(name, gender, year)
+      p.append(person)
+      return person
+   return p.add_person(name, gender, year)
+
+def _split_by_gender(people):
+    males, females = [], []
+    for person in people:
+        if person.gender == "male":
+            males.append(person)
+        elif person.gender == "female":
+            females.append(person)
+        else:
+            print("Gender error")
+    return males, females
+
+def fill_kinship(p):
+    # Derive grandparents, siblings, cousins, aunts/uncles and nieces/nephews
+    # for everyone in p in a single pass over the parent graph and install
+    # them as each person's memo.  p must be in birth order (parents before
+    # children), as famSim builds it.
+    #
+    # Gives the same relatives in the same order as reading them one person
+    # at a time, and as the legacy fill_* passes.  Children of the same
+    # parents share every one of those relations except themselves, so each
+    # couple's relatives are worked out once and copied to all of its
+    # children; the cost is linear in the relations produced.  Use it to
+    # materialize the relations of a whole population at once.
+    order = {person: i for i, person in enumerate(p)}
+    parents_of = {}
+    families = {}
+
+    for person in p:
+        # Founders' parents are placeholders, not members of p.
+        father, mother = person.father, person.mother
+        if father in order and mother in order:
+            parents = (father, mother) if order[father] < order[mother] else (mother, father)
+        else:
+            parents = tuple(q for q in (father, mother) if q in order)
+        parents_of[person] = parents
+
+        family = families.get(parents)
+        if family is None:
+            siblings = list(dict.fromkeys(c for q in parents for c in q.children))
+            grandparents = sorted((g for q in parents for g in parents_of[q]), key=order.get)
+            grandparent_of = [(g, q) for q in parents for g in parents_of[q]]
+            grandparent_of.sort(key=lambda gq: order[gq[0]])
+            # Parents come earlier in p, so their siblings are already filled.
+            uncles, aunts = _split_by_gender(s for q in parents for s in q.siblings)
+            cousins = dict.fromkeys(cousin
+                for grand_person, parent in grandparent_of
+                for sibling_parent in grand_person.children if sibling_parent != parent
+                for cousin in sibling_parent.children)
+            family = families[parents] = (
+                siblings,
+                [g for g in grandparents if g.gender != "female"],
+                [g for g in grandparents if g.gender == "female"],
+                uncles, aunts, cousins,
+                [(s, _split_by_gender(s.children)) for s in sorted(siblings, key=order.get)])
+        siblings, grandfather, grandmother, uncles, aunts, cousins, nephews_by_sibling = family
+
+        nephews, nieces = {}, {}
+        for sibling, (sibling_nephews, sibling_nieces) in nephews_by_sibling:
+            if sibling != person:
+                nephews.update(dict.fromkeys(sibling_nephews))
+                nieces.update(dict.fromkeys(sibling_nieces))
+        person._set_kinship({
+            "grandfather": list(grandfather), "grandmother": list(grandmother),
+            "siblings": dict.fromkeys(s for s in siblings if s != person),
+            "cousins": dict(cousins),
+            "uncles": dict.fromkeys(uncles), "aunts": dict.fromkeys(aunts),
+            "nephews": nephews, "nieces": nieces})
+
 # create initial community
-def create_initial_population():
-   p = []
+def create_initial_population(p=None):
+   if p is None:
+      p = []
    for idx in range(4):
-      p.append( Person(2*idx, "male") )
-      p.append( Person(2*idx+1, "female") )
+      add_person(p, 2*idx, "male")
+      add_person(p, 2*idx+1, "female")
    
    # Make sure that at least two married couples exist in the initial population
    p[0].marry( p[1] )
@@ -207,78 +466,318 @@ def create_initial_population():
    return p
 
 
-random.seed(10)
-birth_probability = 0.32
-marriage_probability = 0.1
+class MarriageMarket:
+   # Index of the men a woman may marry, replacing the reversed(p) scan.
+   # Men wait in birth order until they are over 20, then join the pool,
+   # and leave it when they marry or die.  The pool keeps birth order, so
+   # searching it from the newest end still picks the most recently born
+   # eligible man; the only men ever skipped are the woman's own father
+   # and brothers, which makes each match O(1) amortized.
+   def __init__(self):
+      self.waiting = deque()
+      self.pool = {}
+
+   def register(self, male):
+      self.waiting.append(male)
+
+   def open(self, t):
+      # Admit the men who are over 20 in year t.
+      while self.waiting and self.waiting[0].age(t) > 20:
+         male = self.waiting.popleft()
+         if male.alive and male.spouse == None:
+            self.pool[male] = None
+
+   def remove(self, male):
+      self.pool.pop(male, None)
+
+   def match(self, female):
+      for male in reversed(self.pool):
+         # Make sure immediate family relationship conventions are not violated in marriage.
+         if female.father != male and female.mother != male.mother and female.father != male.father:
+            del self.pool[male]
+            return male
+      return None
+
+
+class FixedLifetime:
+   # Everyone dies at the same age (81 in the original population).
+   # Draws no random numbers, so runs stay reproducible seed for seed.
+   def __init__(self, age=81):
+      self.age = age
+
+   def __call__(self):
+      return self.age
+
+   def sample(self, rng, n):
+      # Ages at death for n newborns of the vectorized engine.
+      return self.age
+
+
+class GaussianLifetime:
+   # Normally distributed age at death, e.g. the v5 design's 65 +/- 10,
+   # rounded to whole years and never less than one.
+   def __init__(self, mean=65, sd=10):
+      self.mean = mean
+      self.sd = sd
+
+   def __call__(self):
+      return max(1, round(random.gauss(self.mean, self.sd)))
+
+   def sample(self, rng, n):
+      return rng.normal(self.mean, self.sd, n).round().clip(1, None).astype(int)
+
+
+class DeathCalendar:
+   # Buckets keyed by the year a person is due to die, filled at birth from
+   # a lifetime distribution, so each year retires exactly the people due
+   # instead of checking everyone's age.  A bucket holds people in the order
+   # they were scheduled (birth order for a fixed lifetime).
+   # People filed with schedule() can be cancelled or rescheduled; their old
+   # bucket entries are skipped when popped, so nobody is retired twice.
+   def __init__(self, lifetime=None):
+      self.lifetime = lifetime if lifetime is not None else FixedLifetime()
+      self.due = {}      # year -> entries filed with add(), e.g. row arrays
+      self.people = {}   # year -> people filed with schedule()
+      self.when = {}     # person -> the year they are currently due
+
+   def add(self, year, entry):
+      self.due.setdefault(year, []).append(entry)
+
+   def schedule(self, person, year=None):
+      # Due at year, or at an age drawn from the lifetime; replaces any
+      # earlier booking.
+      if year is None:
+         year = person.birthyear + self.lifetime()
+      self.when[person] = year
+      self.people.setdefault(year, []).append(person)
+
+   def cancel(self, person):
+      del self.when[person]
+
+   def pop(self, t):
+      entries = self.due.pop(t, [])
+      for person in self.people.pop(t, ()):
+         if self.when.get(person) == t:
+            del self.when[person]
+            entries.append(person)
+      return entries
+
+
+def python_step(p, t, birth_probability, marriage_probability, alive, calendar, market=None):
+   # Advance population p by one year, one person at a time.
+   # alive indexes the living members of p in birth order (a dict used as an
+   # ordered set); births and deaths keep it current, so the yearly loops
+   # never visit the dead.  calendar is the DeathCalendar every newborn is
+   # scheduled on.
+   # With a MarriageMarket, brides are matched through its index;
+   # without one, every marriage scans the whole population history.
+   # For each female in population p, check to see if 
+   # 1. that person # is greater than 20 years old and less than 50 years old.  
+   # 2. that the person has a living male spouse
+   # When these two conditions are true, assign a birth with probability birth_probability 
+   for person in list(alive):
+       cur_birth_prob = birth_probability / (1 + 2*len(person.children))
+       if person.gender == "female" and person.age(t) > 20 and person.age(t) < 50 and person.spouse != None and person.spouse.alive and random.random() < cur_birth_prob and len(person.children) < 8:
+           child = add_person(p, len(p), random.choice(["male", "female"]), t)
+           child.mother = person
+           child.father = person.spouse
+           person.add_child(child)
+           person.spouse.add_child(child)
+           alive[child] = None
+           calendar.schedule(child)
+           if market is not None and child.gender == "male":
+               market.register(child)
+
+   # For each female in the population, check to see if that person is greater than 20 years old
+   # If so, search over all males and marry that female to the first unmarried male 
+   if market is not None:
+       market.open(t)
+   for female in alive:
+       if female.gender == "female" and female.age(t) > 20 and female.spouse == None and random.random() < marriage_probability:
+           if market is not None:
+               male = market.match(female)
+               if male is not None:
+                   female.marry(male)
+               continue
+           for male in reversed(p):
+               # Make sure immediate family relationship conventions are not violated in marriage.
+               if male.alive and male.gender == "male" and male.spouse == None and male.age(t) > 20 and female.father != male and female.mother != male.mother and female.father != male.father:
+                   female.marry(male)
+                   break
+
+   # Eventually a person has to die, at the age their lifetime drew at birth
+   # (81 for everyone in this population by default).
+   for person in calendar.pop(t):
+       person.alive = False
+       person.deathyear = t
+       del alive[person]
+       if market is not None and person.gender == "male":
+           market.remove(person)
+
+
+def run_trial(birth_probability, marriage_probability, steps=1000, engine="python", marriage_index=True,
+              lifetime=None):
+   # Simulate one population from the initial community.
+   # engine: "python"     keeps a list of Person objects,
+   #         "columnar"   keeps a population_store.PopulationStore
+   #                      (identical to "python" for the same seed),
+   #         "vectorized" steps a PopulationStore with whole-column NumPy
+   #                      operations (statistically equivalent, not identical).
+   # marriage_index: match brides through a MarriageMarket (python and
+   #         columnar engines).  It picks the same grooms as the original
+   #         reversed(p) scan, which False restores for reproducibility checks.
+   # lifetime: age-at-death distribution, e.g. GaussianLifetime(65, 10);
+   #         the default FixedLifetime() has everyone die at 81.
+   # Returns the population and its alive count per year.
+   if engine == "python":
+      p = create_initial_population()
+   elif engine in ("columnar", "vectorized"):
+      from population_store import PopulationStore
+      p = create_initial_population(PopulationStore())
+   else:
+      raise ValueError("Unknown engine: %s" % engine)
+
+   market = None
+   calendar = DeathCalendar(lifetime)
+   if engine == "vectorized":
+      import numpy as np
+      from population_store import schedule_deaths, vectorized_step
+      rng = np.random.default_rng(random.getrandbits(64))
+      living = np.arange(len(p))
+      schedule_deaths(calendar, living, 0, calendar.lifetime.sample(rng, len(living)))
+   else:
+      alive = dict.fromkeys(p)
+      for person in p:
+         calendar.schedule(person)
+   if engine != "vectorized" and marriage_index:
+      market = MarriageMarket()
+      for person in p:
+         if person.gender == "male":
+            market.register(person)
 
-p = []
-out = []
-while len(p) < 750 and count_alive(p) < 10:
-   p = create_initial_population()
    counts = []
-   for t in range(1000):
-       # For each female in population p, check to see if 
-       # 1. that person # is greater than 20 years old and less than 50 years old.  
-       # 2. that the person has a male spouse
-       # When these two conditions are true, assign a birth with probability birth_probability 
-       for person in p:
-           cur_birth_prob = birth_probability / (1 + 2*len(person.children))
-           if person.alive and person.gender == "female" and person.age(t) > 20 and person.age(t) < 50 and person.spouse != None and random.random() < cur_birth_prob and len(person.children) < 8:
-               child = Person(len(p), random.choice(["male", "female"]), t)
-               child.mother = person
-               child.father = person.spouse
-               person.add_child(child)
-               person.spouse.add_child(child)
-               p.append(child)
-   
-       # For each female in the population, check to see if that person is greater than 20 years old
-       # If so, search over all males and marry that female to the first unmarried male 
-       for female in p:
-           if female.alive and female.gender == "female" and female.age(t) > 20 and female.spouse == None and random.random() < marriage_probability:
-               for male in reversed(p):
-                   # Make sure immediate family relationship conventions are not violated in marriage.
-                   if male.alive and male.gender == "male" and male.spouse == None and male.age(t) > 20 and female.father != male and female.mother != male.mother and female.father != male.father:
-                       female.marry(male)
-                       break
-   
-       # Eventually a person has to die.  Everyone dies at age 81 in this population.
-       for person in p:
-           if person.alive and person.age(t) > 80:
-               person.alive = False
-               person.deathyear = t
-       counts.append(count_alive(p))
-   
-   # Fill out grandparent relationships 
-   for person in p:
-       for c in person.children:
-           for cc in c.children:
-               if person.gender == "female":
-                   cc.grandmother.append(person)
-               else:
-                   cc.grandfather.append(person)
-   out.append(counts)
-   
-   # Fill out sibling relationships
-   fill_sibling_relationships(p)
-   # TODO: Fill out cousin relationships ... I'm not convinced this works
-   fill_cousin_relationships(p)
-   # Fill out aunt and uncle relationships
-   fill_aunt_or_uncle_relationship(p)
-   fill_niece_or_nephew_relationship(p)
-
-
-a = []
-for person in p: 
-    if person.age(t) < 240: 
-        a.append(person)
-
-for person in a:
-    #print_family(person)
-    #print( create_family_json(person) )
-    w = json.loads(create_family_json(person))
-    for ww in w:
-      if type(w[ww]) == list:
-        for www in w[ww]:
-            print(www, ", _", ww,"_ ,", w['name'])
-      else:
-        print(w[ww],", _",ww,"_ ,", w['name'])
+   for t in range(steps):
+       if engine == "vectorized":
+           living = vectorized_step(p, t, birth_probability, marriage_probability, rng, living, calendar)
+           counts.append(len(living))
+       else:
+           python_step(p, t, birth_probability, marriage_probability, alive, calendar, market)
+           counts.append(len(alive))
+       if counts[-1] == 0:
+           # Nobody is left to marry or give birth, so the remaining years are empty.
+           counts.extend([0] * (steps - t - 1))
+           break
+   return p, counts
+
+
+def accepted(size, alive, min_size=750, min_alive=10):
+   # A trial is kept once it is large or still has enough people alive.
+   return size >= min_size or alive >= min_alive
+
+
+def trial_seed(seed, trial):
+   # Independent, reproducible seed for trial number `trial` of a search.
+   return random.Random("%d:%d" % (seed, trial)).getrandbits(64)
+
+
+def run_seeded_trial(seed, birth_probability, marriage_probability, steps=1000, engine="python",
+                     lifetime=None):
+   # Seeds the module random state, so a trial can be replayed from its seed.
+   random.seed(seed)
+   return run_trial(birth_probability, marriage_probability, steps, engine, lifetime=lifetime)
+
+
+def _search_trial(args):
+   # Worker side of search_trials: run one trial and return its summary only,
+   # since shipping the population back would cost more than replaying it.
+   trial, seed, birth_probability, marriage_probability, steps, engine, lifetime = args
+   p, counts = run_seeded_trial(seed, birth_probability, marriage_probability, steps, engine, lifetime)
+   return {"trial": trial, "seed": seed, "size": len(p), "alive": counts[-1], "counts": counts}
+
+
+def search_trials(birth_probability, marriage_probability, steps=1000, engine="python",
+                  seed=10, workers=None, n_best=None, n_trials=None, criterion=None,
+                  lifetime=None):
+   # Monte Carlo search for long-lived populations across a process pool.
+   # Trial i always runs with trial_seed(seed, i), so the outcome does not
+   # depend on the number of workers.
+   #   n_best=None: return [summary] of the lowest-numbered accepted trial,
+   #                giving up after n_trials trials (if set).
+   #   n_best=N:    run n_trials trials and return the N best summaries by
+   #                criterion(summary) (default: alive count at the end),
+   #                ties broken by trial number.
+   # Replay a summary with run_seeded_trial(summary["seed"], ...).
+   if n_best is not None and n_trials is None:
+      raise ValueError("n_best needs n_trials")
+   if criterion is None:
+      criterion = lambda summary: summary["alive"]
+
+   def batches(batch_size):
+      trial = 0
+      while n_trials is None or trial < n_trials:
+         stop = trial + batch_size if n_trials is None else min(trial + batch_size, n_trials)
+         yield [(i, trial_seed(seed, i), birth_probability, marriage_probability, steps, engine, lifetime)
+                for i in range(trial, stop)]
+         trial = stop
+
+   if workers is None:
+      workers = os.cpu_count() or 1
+   # workers <= 1 runs the trials in this process.
+   workers = max(1, workers)
+   pool = ProcessPoolExecutor(workers) if workers > 1 else None
+   try:
+      batch_size = 4 * workers
+      summaries = []
+      for batch in batches(batch_size):
+         results = pool.map(_search_trial, batch) if pool else map(_search_trial, batch)
+         for summary in results:
+            if n_best is None and accepted(summary["size"], summary["alive"]):
+               return [summary]
+            summaries.append(summary)
+   finally:
+      if pool:
+         pool.shutdown(cancel_futures=True)
+
+   if n_best is None:
+      return []
+   summaries.sort(key=lambda summary: (-criterion(summary), summary["trial"]))
+   return summaries[:n_best]
+
+
+if __name__ == '__main__':
+   random.seed(10)
+   birth_probability = 0.32
+   marriage_probability = 0.1
+   steps = 1000
+   engine = "python"
+   # None: everyone dies at 81; or a distribution such as GaussianLifetime(65, 10).
+   lifetime = None
+   # 0 keeps the serial search on the global random.seed(10) stream;
+   # otherwise search trials on this many processes with per-trial seeds.
+   workers = 0
+
+   p = []
+   out = []
+   if workers:
+      best = search_trials(birth_probability, marriage_probability, steps, engine, seed=10, workers=workers,
+                           lifetime=lifetime)[0]
+      p, counts = run_seeded_trial(best["seed"], birth_probability, marriage_probability, steps, engine, lifetime)
+      out.append(counts)
+   while not out or not accepted(len(p), out[-1][-1]):
+      p, counts = run_trial(birth_probability, marriage_probability, steps, engine, lifetime=lifetime)
+      out.append(counts)
+
+   # Grandparent, sibling, cousin, aunt/uncle and niece/nephew relationships
+   # are derived on demand, only for the people exported below.
+
+   t = steps - 1
+   a = []
+   for person in p: 
+       if person.age(t) < 240: 
+           a.append(person)
+
+   # Stream (object, relation, subject) triples for the exported people.
+   # "text" keeps the original line format; also "tsv", "jsonl" or "binary".
+   export_format = "text"
+   stream = sys.stdout.buffer if export_format == "binary" else sys.stdout
+   export_triples(a, SINKS[export_format](stream))
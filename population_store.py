@@ -0,0 +1,527 @@
+"""
+Columnar population store for famSim.
+
+Instead of one Person object (with ten relationship lists) per individual,
+the store keeps each attribute in a NumPy column indexed by row number:
+name, gender, birth/death year, alive flag and father/mother/spouse row
+indices.  Children are not stored per person; they are derived from the
+father/mother columns into a CSR adjacency (offsets + child rows) the first
+time they are needed after a birth.  Derived relations (grandparents,
+siblings, cousins, aunts/uncles, nieces/nephews) are computed from those
+columns on first access and memoized until the parent graph changes.
+
+PersonView is a thin (store, row) handle exposing the same attributes and
+methods as famSim.Person, so create_family_json and the fill_* functions
+work unchanged on a store.
+"""
+
+import random
+
+import numpy as np
+
+GENDERS = ("male", "female")
+MALE, FEMALE = 0, 1
+
+# Sentinel for "no spouse".  Founders' parents use unique negative
+# placeholders instead (see PopulationStore.add_person).
+NONE = -1
+
+# relation -> the PopulationStore._derive_* method that computes it
+_DERIVED_GROUPS = {"grandfather": "grandparents", "grandmother": "grandparents",
+                   "siblings": "siblings", "cousins": "cousins",
+                   "uncles": "aunts_uncles", "aunts": "aunts_uncles",
+                   "nephews": "nieces_nephews", "nieces": "nieces_nephews"}
+
+
+class PopulationStore:
+    """Struct-of-arrays population; row i is the i-th person added."""
+
+    _COLUMNS = (("name", np.int64, 0),
+                ("gender", np.int8, 0),
+                ("birthyear", np.int32, 0),
+                ("deathyear", np.int32, NONE),
+                ("alive", np.bool_, False),
+                ("father", np.int64, NONE),
+                ("mother", np.int64, NONE),
+                ("spouse", np.int64, NONE),
+                ("n_children", np.int16, 0))
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        for column, dtype, fill in self._COLUMNS:
+            setattr(self, column, np.full(capacity, fill, dtype=dtype))
+        self._child_offsets = None
+        self._child_rows = None
+        # Memoized derived relations: row -> {relation: rows}, only for rows
+        # that have been asked.  Grandparents are lists; the rest are
+        # insertion-ordered sets (dict keys) so add_* deduplicates in O(1).
+        self._kinship = {}
+        # Relatives given explicitly with add_*: row -> {relation: rows}.
+        # Unlike the memos these survive invalidate() and are appended to
+        # each recomputed relation.
+        self._explicit = {}
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        # Like iterating a list, rows appended during iteration are visited too.
+        i = 0
+        while i < self.size:
+            yield PersonView(self, i)
+            i += 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError("population index out of range")
+        return PersonView(self, i)
+
+    @property
+    def capacity(self):
+        return len(self.name)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns (excluding memoized derived relations)."""
+        total = sum(getattr(self, column).nbytes for column, _, _ in self._COLUMNS)
+        if self._child_rows is not None:
+            total += self._child_offsets.nbytes + self._child_rows.nbytes
+        return total
+
+    def _grow(self, capacity):
+        for column, dtype, fill in self._COLUMNS:
+            old = getattr(self, column)
+            new = np.full(capacity, fill, dtype=dtype)
+            new[:len(old)] = old
+            setattr(self, column, new)
+
+    def add_person(self, name, gender, year=0):
+        """Append a living person and return their view.
+
+        famSim.Person gives founders random floats as parents so that no two
+        founders look like siblings; here every row gets its own negative
+        placeholders, which compare unequal to each other and to real rows.
+        The two floats are still drawn (and discarded), so the columnar and
+        python engines consume the module random state alike and give the
+        same population for the same seed.
+        """
+        random.random()
+        random.random()
+        i = self.size
+        if i == self.capacity:
+            self._grow(2 * self.capacity)
+        self.size += 1
+        self.name[i] = name
+        self.gender[i] = GENDERS.index(gender)
+        self.birthyear[i] = year
+        self.alive[i] = True
+        self.father[i] = -2 * i - 2
+        self.mother[i] = -2 * i - 3
+        self.invalidate()
+        return PersonView(self, i)
+
+    def add_people(self, genders, year):
+        """Append one living person per gender code; return their rows.
+
+        Names follow famSim's convention of name == row.  Unlike
+        add_person this draws no random numbers: the vectorized engine that
+        uses it takes its randomness from a NumPy generator instead.
+        """
+        start, count = self.size, len(genders)
+        if start + count > self.capacity:
+            self._grow(max(2 * self.capacity, start + count))
+        rows = np.arange(start, start + count)
+        self.size += count
+        self.name[rows] = rows
+        self.gender[rows] = genders
+        self.birthyear[rows] = year
+        self.alive[rows] = True
+        self.father[rows] = -2 * rows - 2
+        self.mother[rows] = -2 * rows - 3
+        self.invalidate()
+        return rows
+
+    def invalidate(self):
+        """Drop derived structures after the parent graph changed."""
+        self._child_offsets = None
+        if self._kinship:
+            self._kinship = {}
+
+    def count_alive(self):
+        return int(np.count_nonzero(self.alive[:self.size]))
+
+    def children_of(self, i):
+        """Rows naming row i as father or mother, in birth order."""
+        if self._child_offsets is None:
+            self._build_children()
+        return self._child_rows[self._child_offsets[i]:self._child_offsets[i + 1]]
+
+    def kinship(self, i, rel):
+        """Derived relation rel of row i, computed on first use."""
+        kinship = self._kinship.get(i)
+        if kinship is None:
+            kinship = self._kinship[i] = {}
+        if rel not in kinship:
+            kinship.update(self._with_explicit(i, getattr(self, "_derive_" + _DERIVED_GROUPS[rel])(i)))
+        return kinship[rel]
+
+    def _with_explicit(self, i, derived):
+        # Append row i's explicit add_* entries to freshly derived relations.
+        explicit = self._explicit.get(i)
+        if explicit:
+            for rel, rows in derived.items():
+                extra = explicit.get(rel)
+                if not extra:
+                    continue
+                if isinstance(rows, list):
+                    rows.extend(j for j in extra if j not in rows)
+                else:
+                    rows.update(extra)
+        return derived
+
+    def set_kinship(self, i, kinship):
+        """Install relations worked out elsewhere (famSim.fill_kinship) as row i's memo."""
+        self._kinship[i] = self._with_explicit(i, kinship)
+
+    def add_kinship(self, i, rel, rows):
+        """Merge rows into relation rel of row i as explicit entries; return the newcomers."""
+        relatives = self.kinship(i, rel)
+        added = [j for j in dict.fromkeys(rows) if j not in relatives]
+        if isinstance(relatives, list):
+            relatives.extend(added)
+        else:
+            relatives.update(dict.fromkeys(added))
+        if added:
+            self._explicit.setdefault(i, {}).setdefault(rel, {}).update(dict.fromkeys(added))
+        return added
+
+    # The derivations list relatives in the order famSim's fill_* passes
+    # would, taking people in row order.
+
+    def _parents(self, i):
+        return sorted(int(q) for q in (self.father[i], self.mother[i]) if q >= 0)
+
+    def _grandparents(self, i):
+        return sorted((g, q) for q in self._parents(i) for g in self._parents(q))
+
+    def _split_by_gender(self, rows):
+        rows = list(rows)
+        female = self.gender[rows] == FEMALE if rows else ()
+        return ([j for j, f in zip(rows, female) if not f],
+                [j for j, f in zip(rows, female) if f])
+
+    def _derive_grandparents(self, i):
+        grandfather, grandmother = self._split_by_gender(g for g, _ in self._grandparents(i))
+        return {"grandfather": grandfather, "grandmother": grandmother}
+
+    def _derive_siblings(self, i):
+        return {"siblings": dict.fromkeys(int(c) for q in self._parents(i)
+                                          for c in self.children_of(q) if c != i)}
+
+    def _derive_cousins(self, i):
+        return {"cousins": dict.fromkeys(int(cousin)
+            for grand_person, parent in self._grandparents(i)
+            for sibling_parent in self.children_of(grand_person) if sibling_parent != parent
+            for cousin in self.children_of(sibling_parent))}
+
+    def _derive_aunts_uncles(self, i):
+        uncles, aunts = self._split_by_gender(
+            s for q in self._parents(i) for s in self.kinship(q, "siblings"))
+        return {"uncles": dict.fromkeys(uncles), "aunts": dict.fromkeys(aunts)}
+
+    def _derive_nieces_nephews(self, i):
+        nephews, nieces = self._split_by_gender(
+            int(c) for s in sorted(self.kinship(i, "siblings")) for c in self.children_of(s))
+        return {"nephews": dict.fromkeys(nephews), "nieces": dict.fromkeys(nieces)}
+
+    def _build_children(self):
+        n = self.size
+        parents = np.concatenate((self.father[:n], self.mother[:n]))
+        rows = np.concatenate((np.arange(n), np.arange(n)))
+        known = parents >= 0
+        parents, rows = parents[known], rows[known]
+        order = np.lexsort((rows, parents))
+        self._child_rows = rows[order]
+        self._child_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(parents, minlength=n), out=self._child_offsets[1:])
+
+
+class _Children:
+    """Sequence of a person's children; len() comes from the count column."""
+
+    __slots__ = ("_store", "_idx")
+
+    def __init__(self, store, idx):
+        self._store = store
+        self._idx = idx
+
+    def __len__(self):
+        return int(self._store.n_children[self._idx])
+
+    def __iter__(self):
+        store = self._store
+        return (PersonView(store, int(j)) for j in store.children_of(self._idx))
+
+    def __getitem__(self, k):
+        return PersonView(self._store, int(self._store.children_of(self._idx)[k]))
+
+
+def _relation_property(rel):
+    def getter(self):
+        return [PersonView(self._store, j) for j in self._store.kinship(self._idx, rel)]
+    return property(getter, doc=f"Derived {rel} (read-only list of views).")
+
+
+class PersonView:
+    """famSim.Person-compatible handle on one row of a PopulationStore."""
+
+    __slots__ = ("_store", "_idx")
+
+    def __init__(self, store, idx):
+        self._store = store
+        self._idx = idx
+
+    def __eq__(self, other):
+        if not isinstance(other, PersonView):
+            return NotImplemented
+        return self._store is other._store and self._idx == other._idx
+
+    def __hash__(self):
+        return hash(self._idx)
+
+    def __repr__(self):
+        return f"PersonView({self.name})"
+
+    @property
+    def name(self):
+        return int(self._store.name[self._idx])
+
+    @property
+    def gender(self):
+        return GENDERS[self._store.gender[self._idx]]
+
+    @property
+    def birthyear(self):
+        return int(self._store.birthyear[self._idx])
+
+    @property
+    def deathyear(self):
+        year = self._store.deathyear[self._idx]
+        return None if year == NONE else int(year)
+
+    @deathyear.setter
+    def deathyear(self, year):
+        self._store.deathyear[self._idx] = NONE if year is None else year
+
+    @property
+    def alive(self):
+        return bool(self._store.alive[self._idx])
+
+    @alive.setter
+    def alive(self, value):
+        self._store.alive[self._idx] = value
+
+    def _parent(self, column):
+        j = int(column[self._idx])
+        # Founders' placeholders are returned as-is, like Person's random floats.
+        return PersonView(self._store, j) if j >= 0 else j
+
+    @property
+    def father(self):
+        return self._parent(self._store.father)
+
+    @father.setter
+    def father(self, person):
+        self._store.father[self._idx] = person._idx
+        self._store.invalidate()
+
+    @property
+    def mother(self):
+        return self._parent(self._store.mother)
+
+    @mother.setter
+    def mother(self, person):
+        self._store.mother[self._idx] = person._idx
+        self._store.invalidate()
+
+    @property
+    def spouse(self):
+        j = self._store.spouse[self._idx]
+        return None if j == NONE else PersonView(self._store, int(j))
+
+    @spouse.setter
+    def spouse(self, person):
+        self._store.spouse[self._idx] = NONE if person is None else person._idx
+
+    @property
+    def children(self):
+        return _Children(self._store, self._idx)
+
+    grandfather = _relation_property("grandfather")
+    grandmother = _relation_property("grandmother")
+    siblings = _relation_property("siblings")
+    cousins = _relation_property("cousins")
+    uncles = _relation_property("uncles")
+    aunts = _relation_property("aunts")
+    nephews = _relation_property("nephews")
+    nieces = _relation_property("nieces")
+
+    def marry(self, spouse):
+        if self.spouse == None:
+            self.spouse = spouse
+            spouse.marry(self)
+
+    def add_child(self, child):
+        # Children are read back from the parent columns, so record the link there.
+        if self.gender == "male":
+            child.father = self
+        else:
+            child.mother = self
+        self._store.n_children[self._idx] += 1
+
+    def _set_kinship(self, kinship):
+        self._store.set_kinship(self._idx, {
+            rel: ([q._idx for q in people] if isinstance(people, list) else dict.fromkeys(q._idx for q in people))
+            for rel, people in kinship.items()})
+
+    def _add(self, rel, other):
+        return bool(self._store.add_kinship(self._idx, rel, (other._idx,)))
+
+    def add_grandparent(self, grandparent):
+        rel = "grandmother" if grandparent.gender == "female" else "grandfather"
+        self._store.add_kinship(self._idx, rel, (grandparent._idx,))
+
+    def _merge(self, rel, people):
+        # Add people in order; return the newcomers (as famSim.Person._add).
+        added = self._store.add_kinship(self._idx, rel, [q._idx for q in people])
+        return [PersonView(self._store, j) for j in added]
+
+    def add_sibling(self, sibling):
+        if self._add("siblings", sibling):
+            sibling.add_sibling(self)
+
+    def add_siblings(self, siblings):
+        # Two-way, like famSim.Person.add_siblings.
+        for sibling in self._merge("siblings", (s for s in siblings if s != self)):
+            sibling._add("siblings", self)
+
+    def add_cousin(self, cousin):
+        if self._add("cousins", cousin):
+            cousin.add_cousin(self)
+
+    def add_cousins(self, cousins):
+        for cousin in self._merge("cousins", cousins):
+            cousin._add("cousins", self)
+
+    def add_uncle(self, uncle):
+        self._add("uncles", uncle)
+
+    def add_uncles(self, uncles):
+        self._merge("uncles", uncles)
+
+    def add_aunt(self, aunt):
+        self._add("aunts", aunt)
+
+    def add_aunts(self, aunts):
+        self._merge("aunts", aunts)
+
+    def add_nephew(self, nephew):
+        self._add("nephews", nephew)
+
+    def add_nephews(self, nephews):
+        self._merge("nephews", nephews)
+
+    def add_niece(self, niece):
+        self._add("nieces", niece)
+
+    def add_nieces(self, nieces):
+        self._merge("nieces", nieces)
+
+    def age(self, t):
+        return t - self.birthyear
+
+
+def schedule_deaths(calendar, rows, year, ages):
+    """File rows born in year into calendar's buckets by age at death.
+
+    ages is a scalar (everyone dies at the same age) or one age per row;
+    each bucket entry is an array of rows in ascending order.
+    """
+    if not len(rows):
+        return
+    if np.ndim(ages) == 0:
+        calendar.add(year + int(ages), rows)
+        return
+    order = np.argsort(ages, kind="stable")
+    values, starts = np.unique(ages[order], return_index=True)
+    for age, chunk in zip(values.tolist(), np.split(rows[order], starts[1:])):
+        calendar.add(year + age, chunk)
+
+
+def vectorized_step(store, t, birth_probability, marriage_probability, rng, living,
+                    calendar, max_children=8):
+    """Advance a store by one year with whole-column operations.
+
+    living holds the rows of the people alive, in ascending order; the step
+    only looks at those rows and returns the updated array, so the work per
+    year follows the living population rather than everyone ever born.
+    calendar is a famSim.DeathCalendar: newborns are scheduled on it with
+    schedule_deaths, and the rows due in year t die.
+
+    Follows famSim's yearly rules (births, then marriages, then deaths at
+    the scheduled age) but draws from a NumPy Generator in batches, so populations are
+    statistically equivalent to the python engine rather than identical.
+    """
+    age = t - store.birthyear[living]
+    female = store.gender[living] == FEMALE
+    unmarried = store.spouse[living] == NONE
+    n_children = store.n_children[living]
+
+    # Births: one Bernoulli draw per fertile woman whose husband is alive,
+    # with the per-child decay birth_probability / (1 + 2*children).
+    # (Unmarried rows index alive[NONE], which the mask discards.)
+    widowed = ~store.alive[store.spouse[living]]
+    fertile = female & (age > 20) & (age < 50) & ~unmarried & ~widowed & (n_children < max_children)
+    mothers = living[fertile]
+    prob = birth_probability / (1 + 2 * n_children[fertile])
+    mothers = mothers[rng.random(len(mothers)) < prob]
+    born = store.add_people(rng.integers(0, 2, len(mothers)), t)
+    if len(mothers):
+        fathers = store.spouse[mothers]
+        store.mother[born] = mothers
+        store.father[born] = fathers
+        # Marriages are monogamous, so no parent appears twice here.
+        store.n_children[mothers] += 1
+        store.n_children[fathers] += 1
+
+    # Marriages: each selected woman takes the most recently born eligible
+    # man who is neither her father nor shares a parent with her.
+    adult = (age > 20) & unmarried
+    brides = living[adult & female]
+    brides = brides[rng.random(len(brides)) < marriage_probability]
+    grooms = living[adult & ~female][::-1]
+    if len(brides) and len(grooms):
+        free = np.ones(len(grooms), dtype=bool)
+        groom_father = store.father[grooms]
+        groom_mother = store.mother[grooms]
+        for bride in brides:
+            father, mother = store.father[bride], store.mother[bride]
+            ok = free & (grooms != father) & (groom_mother != mother) & (groom_father != father)
+            k = np.argmax(ok)
+            if ok[k]:
+                free[k] = False
+                store.spouse[bride] = grooms[k]
+                store.spouse[grooms[k]] = bride
+
+    schedule_deaths(calendar, born, t, calendar.lifetime.sample(rng, len(born)))
+
+    # Deaths: exactly the rows scheduled for this year.
+    due = calendar.pop(t)
+    if not due:
+        return np.concatenate((living, born))
+    dying = np.concatenate(due)
+    store.alive[dying] = False
+    store.deathyear[dying] = t
+    return np.concatenate((living[store.alive[living]], born))
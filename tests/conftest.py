@@ -0,0 +1,34 @@
+# famSim and the v5 planning modules import their siblings by bare name.
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+V5 = os.path.join(ROOT, "version_advancement_planning")
+sys.path[:0] = [ROOT, V5]
+
+
+@pytest.fixture
+def v5_simulation():
+    """Factory for a v5 simulation set up from the shipped economy config,
+    with extra founders (ages 0-30) so the event series has people to
+    marry, bear children and die within a few decades."""
+    import simulation_api_stubs as api
+    import simulation_event_implementation as events
+
+    def make(founders=0, seed=42, **options):
+        sim = api.Simulation(seed=seed, **options)
+        events.initialize_simulation(sim, os.path.join(V5, "economy_config.json"))
+        rng = random.Random(seed)
+        for _ in range(founders):
+            person = api.Person(id=sim.next_person_id(), gender=rng.choice(['male', 'female']),
+                                birth_time=-rng.uniform(0, 30) * 365)
+            for profession in sim.community.profession_data.values():
+                person.aptitudes[profession.skill_name] = rng.uniform(0.7, 1.3)
+            sim.population[person.id] = person
+            sim.add_person_to_indices(person)
+            sim.schedule(events.DeathEvent(person.birth_time + rng.gauss(65, 10) * 365, person.id))
+        return sim
+    return make
@@ -0,0 +1,20 @@
+from batched_matching import BatchedFamilyPreferenceMatching
+from simulation_api_stubs import RelationType
+
+
+def state(sim):
+    return (len(sim.population), sim.alive_population_count, sorted(sim.professions.items()),
+            sorted((pid, sorted(p.skill_hours.items())) for pid, p in sim.population.items()),
+            sim.rng.random())
+
+
+def test_batched_matching_matches_family_preference_matching(v5_simulation):
+    results = []
+    for batched in (False, True):
+        sim = v5_simulation(founders=200)
+        if batched:
+            sim.matchmaking_strategy = BatchedFamilyPreferenceMatching()
+        sim.run(max_time=80 * 365)
+        results.append(state(sim))
+        assert any(sim.relationships.get_outbound(pid, RelationType.APPRENTICE) for pid in sim.population)
+    assert results[0] == results[1]
@@ -0,0 +1,74 @@
+import pytest
+
+import simulation_api_stubs as api
+from simulation_api_stubs import Simulation
+
+YEAR = 365
+
+
+def state(sim):
+    skills = sorted((pid, sorted(person.skill_hours.items())) for pid, person in sim.population.items())
+    return (sim.time, len(sim.population), sim.alive_population_count, sorted(sim.professions.items()),
+            skills, sorted(sim.community.market_gaps.items()), len(sim.event_queue), sim.rng.getstate())
+
+
+def executed(sim, max_time):
+    """Run sim to max_time; return the events it executed, in order."""
+    log = []
+    pop = sim.event_queue.pop
+
+    def record():
+        event = pop()
+        if not event.cancelled and event.time >= sim.time:
+            log.append((event.time, type(event).__name__))
+        return event
+    sim.event_queue.pop = record
+    sim.run(max_time=max_time)
+    del sim.event_queue.pop
+    return log
+
+
+@pytest.mark.parametrize("mode", ["tick", "lazy"])
+def test_resumed_run_matches_uninterrupted_run(v5_simulation, tmp_path, mode):
+    path = str(tmp_path / "sim.ckpt")
+    first = v5_simulation(founders=150, skill_accrual=mode)
+    first.run(max_time=10 * YEAR)
+    first.save_checkpoint(path)
+    # Apprenticeships are under way across the checkpoint.
+    edges = first.relationships.snapshot(first.time)
+    assert any(rel_type == api.RelationType.APPRENTICE for _, _, rel_type, _ in edges)
+    assert mode == "tick" or first.accruals
+
+    uninterrupted = v5_simulation(founders=150, skill_accrual=mode)
+    uninterrupted.run(max_time=10 * YEAR)
+    expected = executed(uninterrupted, 40 * YEAR)
+    resumed = Simulation.load_checkpoint(path)
+    assert executed(resumed, 40 * YEAR) == expected
+    assert state(resumed) == state(uninterrupted)
+    assert len(resumed.population) > 150
+
+
+def test_run_checkpoints_every_interval(v5_simulation, tmp_path, monkeypatch):
+    path = tmp_path / "sim.ckpt"
+    saved = []
+    save = Simulation.save_checkpoint
+
+    def record(sim, path):
+        saved.append(sim.time)
+        save(sim, path)
+    monkeypatch.setattr(Simulation, "save_checkpoint", record)
+
+    sim = v5_simulation(founders=150)
+    sim.run(max_time=30 * YEAR, checkpoint_path=str(path), checkpoint_every=5 * YEAR)
+    # One save at the first event on or after each 5-year mark.
+    assert [int(time // (5 * YEAR)) for time in saved] == [1, 2, 3, 4, 5, 6]
+    assert list(tmp_path.iterdir()) == [path]
+    assert path.read_bytes().startswith(api.CHECKPOINT_MAGIC)
+
+    monkeypatch.undo()
+    restored = Simulation.load_checkpoint(str(path))
+    assert restored.time == saved[-1] == sim.time
+    uninterrupted = v5_simulation(founders=150)
+    uninterrupted.run(max_time=45 * YEAR)
+    restored.run(max_time=45 * YEAR)
+    assert state(restored) == state(uninterrupted)
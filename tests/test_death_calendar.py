@@ -0,0 +1,92 @@
+import random
+
+import numpy as np
+import pytest
+
+import famSim
+from population_store import schedule_deaths
+
+
+def people(n):
+    return [famSim.Person(name, "female", year=name) for name in range(n)]
+
+
+def names(entries):
+    return [person.name for person in entries]
+
+
+def test_pop_returns_exactly_the_people_due():
+    calendar = famSim.DeathCalendar(famSim.FixedLifetime(10))
+    p = people(5)
+    for person in p:
+        calendar.schedule(person)
+    calendar.schedule(p[0], 13)
+    assert calendar.pop(11) == [p[1]]
+    assert calendar.pop(11) == []
+    assert names(calendar.pop(13)) == [3, 0]
+    assert calendar.pop(10) == []
+
+
+def test_cancelled_and_rescheduled_people_die_once():
+    calendar = famSim.DeathCalendar(famSim.FixedLifetime(10))
+    p = people(4)
+    for person in p:
+        calendar.schedule(person, 20)
+    calendar.cancel(p[0])
+    calendar.schedule(p[1], 25)
+    calendar.schedule(p[2], 20)
+    assert names(calendar.pop(20)) == [2, 3]
+    assert names(calendar.pop(25)) == [1]
+    assert calendar.when == {}
+    calendar.schedule(p[3], 30)
+    calendar.cancel(p[3])
+    assert calendar.pop(30) == []
+
+
+def test_fixed_lifetime_draws_no_random_numbers():
+    random.seed(4)
+    state = random.getstate()
+    lifetime = famSim.FixedLifetime()
+    assert [lifetime() for _ in range(3)] == [81, 81, 81]
+    assert lifetime.sample(np.random.default_rng(0), 3) == 81
+    assert random.getstate() == state
+
+
+def test_gaussian_lifetime_draws_whole_positive_years():
+    random.seed(4)
+    lifetime = famSim.GaussianLifetime(5, 10)
+    ages = [lifetime() for _ in range(2000)]
+    assert all(isinstance(age, int) and age >= 1 for age in ages)
+    sampled = lifetime.sample(np.random.default_rng(0), 2000)
+    assert sampled.dtype.kind == "i" and sampled.min() == 1
+    lifetime = famSim.GaussianLifetime(65, 10)
+    assert abs(np.mean([lifetime() for _ in range(2000)]) - 65) < 1
+    assert abs(lifetime.sample(np.random.default_rng(0), 2000).mean() - 65) < 1
+
+
+def test_schedule_deaths_files_rows_by_year():
+    calendar = famSim.DeathCalendar()
+    rows = np.arange(10, 16)
+    schedule_deaths(calendar, rows, 100, np.array([3, 1, 3, 2, 1, 3]))
+    assert sorted(calendar.due) == [101, 102, 103]
+    assert [chunk.tolist() for chunk in calendar.pop(101)] == [[11, 14]]
+    assert [chunk.tolist() for chunk in calendar.pop(103)] == [[10, 12, 15]]
+    schedule_deaths(calendar, rows[:2], 100, 2)
+    assert [chunk.tolist() for chunk in calendar.pop(102)] == [[13], [10, 11]]
+    schedule_deaths(calendar, rows[:0], 100, np.array([], dtype=int))
+    assert calendar.due == {}
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar", "vectorized"])
+def test_everyone_dies_at_the_age_drawn_at_birth(engine):
+    p, counts = famSim.run_seeded_trial(2, 0.6, 0.2, steps=200, engine=engine)
+    dead = 0
+    for i in range(len(p)):
+        person = p[i]
+        if person.birthyear + 81 < 200:
+            assert not person.alive and person.deathyear == person.birthyear + 81
+            dead += 1
+        else:
+            assert person.alive and person.deathyear is None
+    assert dead > 8
+    assert counts[-1] == len(p) - dead
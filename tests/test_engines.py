@@ -0,0 +1,78 @@
+import random
+import statistics
+
+import pytest
+
+import famSim
+
+FOUNDERS = 8
+
+
+def describe(p):
+    # Everything a run decides, with parents and spouses by name; founders'
+    # placeholder parents differ between engines and are left out.
+    people = []
+    for i, person in enumerate(p):
+        parents = (person.father.name, person.mother.name) if i >= FOUNDERS else None
+        spouse = person.spouse.name if person.spouse is not None else None
+        people.append((person.name, person.gender, person.birthyear, person.deathyear, parents, spouse))
+    return people
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_columnar_engine_matches_python_engine_for_a_seed(seed):
+    python, python_counts = famSim.run_seeded_trial(seed, 0.32, 0.1, steps=150)
+    columnar, columnar_counts = famSim.run_seeded_trial(seed, 0.32, 0.1, steps=150, engine="columnar")
+    assert len(python) > 2 * FOUNDERS
+    assert python_counts == columnar_counts
+    assert describe(python) == describe(columnar)
+
+
+def test_vectorized_engine_matches_python_engine_statistics():
+    # Different random streams, so compare the spread of outcomes over
+    # many seeds: means within four standard errors of each other.
+    outcomes = {}
+    for engine in ("python", "vectorized"):
+        runs = [famSim.run_seeded_trial(seed, 0.6, 0.2, steps=120, engine=engine) for seed in range(40)]
+        outcomes[engine] = ([len(p) for p, _ in runs], [counts[-1] for _, counts in runs])
+    for python, vectorized in zip(outcomes["python"], outcomes["vectorized"]):
+        error = (statistics.variance(python) / len(python) + statistics.variance(vectorized) / len(vectorized)) ** 0.5
+        assert abs(statistics.mean(python) - statistics.mean(vectorized)) < 4 * error
+        assert statistics.mean(vectorized) > 2 * FOUNDERS
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar", "vectorized"])
+@pytest.mark.parametrize("lifetime", [None, famSim.GaussianLifetime(55, 15)])
+def test_parents_are_alive_at_birth(engine, lifetime):
+    # Deaths come after the year's births, so a parent may die the same year.
+    births = 0
+    for seed in range(5):
+        p, _ = famSim.run_seeded_trial(seed, 0.6, 0.2, steps=150, engine=engine, lifetime=lifetime)
+        for i in range(FOUNDERS, len(p)):
+            child = p[i]
+            for parent in (child.father, child.mother):
+                assert parent.birthyear < child.birthyear
+                assert parent.deathyear is None or parent.deathyear >= child.birthyear
+            births += 1
+    assert births > 100
+
+
+def test_vectorized_child_counts_match_child_lists():
+    p, _ = famSim.run_seeded_trial(1, 0.6, 0.2, steps=150, engine="vectorized")
+    for i in range(len(p)):
+        children = p.children_of(i)
+        assert p.n_children[i] == len(children)
+        assert all(p.father[child] == i or p.mother[child] == i for child in children)
+    assert p.n_children[:len(p)].sum() == 2 * (len(p) - FOUNDERS)
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar"])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_marriage_index_picks_the_same_grooms_as_the_scan(engine, seed):
+    runs = []
+    for marriage_index in (True, False):
+        random.seed(seed)
+        p, counts = famSim.run_trial(0.6, 0.2, steps=150, engine=engine, marriage_index=marriage_index)
+        runs.append((counts, describe(p)))
+    assert runs[0] == runs[1]
+    assert sum(spouse is not None for *_, spouse in runs[0][1]) > 2 * FOUNDERS
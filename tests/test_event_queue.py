@@ -0,0 +1,84 @@
+from simulation_api_stubs import Event, Simulation
+
+
+class Tick(Event):
+    def execute(self, sim):
+        sim.ticks.append(self.time)
+
+
+def test_tombstones_count_only_events_cancelled_through_the_simulation():
+    sim = Simulation(seed=1)
+    sim.ticks = []
+    direct, counted = sim.schedule(Tick(1.0)), sim.schedule(Tick(3.0))
+    sim.schedule(Tick(2.0))
+    direct.cancel()
+    sim.cancel(counted)
+    assert sim.tombstones == 1
+    # Popping the directly cancelled event must not use up counted's tombstone.
+    sim.run(max_time=2.0)
+    assert sim.tombstones == 1
+    sim.run(max_time=10.0)
+    assert sim.tombstones == 0
+    assert sim.ticks == [2.0]
+    assert not counted.tombstone
+
+
+class Mark(Event):
+    def __init__(self, time, name):
+        super().__init__(time)
+        self.name = name
+
+    def execute(self, sim):
+        sim.fired.append((self.time, self.name))
+
+
+class Market(Event):
+    # Like CareerMarketEvent: starts a quarterly series at its own time.
+    def __init__(self, time, recurring):
+        super().__init__(time)
+        self.recurring = recurring
+
+    def execute(self, sim):
+        sim.fired.append((self.time, "market"))
+        if self.time > 0:
+            return
+        if self.recurring:
+            sim.schedule_recurring(Mark(self.time, "tick"), 1.0, occurrences=8, fixed_priority=True)
+        else:
+            for k in range(8):
+                sim.schedule(Mark(self.time + k, "tick"))
+
+
+def test_fixed_priority_series_fires_like_prescheduled_copies():
+    fired = []
+    for recurring in (True, False):
+        sim = Simulation(seed=1)
+        sim.fired = []
+        sim.schedule_recurring(Market(0.0, recurring), 4.0)
+        sim.run(max_time=10.0)
+        fired.append(sim.fired)
+    assert fired[0] == fired[1]
+    # The series was queued before the market's next firing, so it goes first.
+    assert fired[0].index((4.0, "tick")) < fired[0].index((4.0, "market"))
+
+
+class Visit(Tick):
+    def __init__(self, time, person_id):
+        super().__init__(time)
+        self.person_id = person_id
+
+    def participants(self):
+        return (self.person_id,)
+
+
+def test_direct_cancel_leaves_pending_events():
+    sim = Simulation(seed=1)
+    sim.ticks = []
+    first, second = sim.schedule(Visit(1.0, 7)), sim.schedule(Visit(2.0, 7))
+    first.cancel()
+    assert sim.pending_events == {7: {second}}
+    second.cancel()
+    assert sim.pending_events == {}
+    assert sim.tombstones == 0
+    sim.run(max_time=10.0)
+    assert sim.ticks == []
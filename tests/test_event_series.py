@@ -0,0 +1,25 @@
+from simulation_api_stubs import RelationType
+
+
+def test_shipped_config_runs(v5_simulation):
+    sim = v5_simulation()
+    assert sim.community.profession_data
+    sim.run(max_time=300 * 365)
+    assert sim.time >= 299 * 365
+
+
+def test_births_and_widowhood(v5_simulation):
+    sim = v5_simulation(founders=200)
+    founders = len(sim.population)
+    sim.run(max_time=80 * 365)
+    assert len(sim.population) > founders
+    graph = sim.relationships
+    children = [pid for pid in sim.population if graph.get_parents(pid)]
+    assert children and all(len(graph.get_parents(pid)) == 2 for pid in children)
+    # Deaths end both directions of a marriage.
+    ended = [(a, b) for a in sim.population for b, _, meta in graph.get_outbound(a, RelationType.SPOUSE)
+             if 'end_time' in meta]
+    assert ended
+    assert all(any(other == a and 'end_time' in meta
+                   for other, _, meta in graph.get_outbound(b, RelationType.SPOUSE))
+               for a, b in ended)
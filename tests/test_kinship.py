@@ -0,0 +1,192 @@
+import random
+
+import pytest
+
+import famSim
+from population_store import PopulationStore
+
+
+def founders(engine, n, seed=1):
+    # People without parents, so every derived relation starts out empty.
+    rng = random.Random(seed)
+    p = [] if engine == "python" else PopulationStore()
+    for name in range(n):
+        famSim.add_person(p, name, rng.choice(["male", "female"]))
+    return p
+
+
+def names(relatives):
+    return [q.name for q in relatives]
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar"])
+def test_bulk_adds_match_pairwise_adds(engine):
+    groups = [[0, 1, 2, 1], [2, 3, 4], [5, 0, 6]]
+    pairwise, bulk = founders(engine, 8), founders(engine, 8)
+    for group in groups:
+        for i in group:
+            for j in group:
+                if i != j:
+                    pairwise[i].add_sibling(pairwise[j])
+            bulk[i].add_siblings([bulk[j] for j in group])
+        for i in group:
+            for j in (7, group[0]):
+                pairwise[i].add_cousin(pairwise[j])
+            bulk[i].add_cousins([bulk[7], bulk[group[0]]])
+    for a, b in zip(pairwise, bulk):
+        assert names(a.siblings) == names(b.siblings)
+        assert names(a.cousins) == names(b.cousins)
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar"])
+def test_bulk_sibling_and_cousin_adds_are_two_way(engine):
+    p = founders(engine, 4)
+    p[0].add_siblings([p[0], p[1], p[2]])
+    p[3].add_cousins([p[1]])
+    assert names(p[0].siblings) == [1, 2]
+    assert names(p[1].siblings) == [0]
+    assert names(p[2].siblings) == [0]
+    assert names(p[1].cousins) == [3]
+
+
+RELATIONS = ("grandfather", "grandmother", "siblings", "cousins", "uncles", "aunts", "nephews", "nieces")
+
+
+class EagerPerson:
+    # Reference copy of a person with famSim's original eager storage: plain
+    # lists filled by pairwise adds, so the legacy fill_* passes can run on
+    # it independently of the derived relations.
+    def __init__(self, person):
+        self.name = person.name
+        self.gender = person.gender
+        self.children = []
+        self.grandfather, self.grandmother = [], []
+        self.siblings, self.cousins, self.uncles, self.aunts, self.nephews, self.nieces = [], [], [], [], [], []
+
+    def add_grandparent(self, grandparent):
+        (self.grandmother if grandparent.gender == "female" else self.grandfather).append(grandparent)
+
+    def add_sibling(self, sibling):
+        if sibling not in self.siblings:
+            self.siblings.append(sibling)
+            sibling.add_sibling(self)
+
+    def add_siblings(self, siblings):
+        for sibling in siblings:
+            if sibling is not self:
+                self.add_sibling(sibling)
+
+    def add_cousin(self, cousin):
+        if cousin not in self.cousins:
+            self.cousins.append(cousin)
+            cousin.add_cousin(self)
+
+    def add_cousins(self, cousins):
+        for cousin in cousins:
+            self.add_cousin(cousin)
+
+    def _add(self, relatives, person):
+        if person not in relatives:
+            relatives.append(person)
+
+    def add_uncle(self, uncle):
+        self._add(self.uncles, uncle)
+
+    def add_aunt(self, aunt):
+        self._add(self.aunts, aunt)
+
+    def add_nephew(self, nephew):
+        self._add(self.nephews, nephew)
+
+    def add_niece(self, niece):
+        self._add(self.nieces, niece)
+
+
+def legacy_kinship(p):
+    # Relations of everyone in p from the original fill_* passes.
+    copies = {person.name: EagerPerson(person) for person in p}
+    for person in p:
+        copies[person.name].children = [copies[child.name] for child in person.children]
+    eager = list(copies.values())
+    famSim.fill_grandparent_relationships(eager)
+    famSim.fill_sibling_relationships(eager)
+    famSim.fill_cousin_relationships(eager)
+    famSim.fill_aunt_or_uncle_relationship(eager)
+    famSim.fill_niece_or_nephew_relationship(eager)
+    return {person.name: {rel: names(getattr(person, rel)) for rel in RELATIONS} for person in eager}
+
+
+def simulated(engine, seed):
+    # A few hundred people over about eight generations.
+    random.seed(seed)
+    p, _ = famSim.run_trial(0.6, 0.2, steps=220, engine=engine)
+    return p
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar"])
+@pytest.mark.parametrize("seed", [1, 2, 5])
+def test_fill_kinship_matches_legacy_fill_passes(engine, seed):
+    p = simulated(engine, seed)
+    expected = legacy_kinship(p)
+    famSim.fill_kinship(p)
+    for person in p:
+        assert {rel: names(getattr(person, rel)) for rel in RELATIONS} == expected[person.name]
+
+
+def kinship(p):
+    return {person.name: {rel: names(getattr(person, rel)) for rel in RELATIONS} for person in p}
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar"])
+def test_derived_relations_match_legacy_fill_passes(engine):
+    p = simulated(engine, 3)
+    assert kinship(p) == legacy_kinship(p)
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar"])
+def test_memos_follow_births_after_they_were_read(engine):
+    # New children change their parents' relatives' memos, and only
+    # those need recomputing; the rest must still be right.
+    p = simulated(engine, 2)
+    kinship(p)
+    rng = random.Random(0)
+    mothers = [q for q in p if q.gender == "female" and q.spouse is not None]
+    for mother in rng.sample(mothers, 12):
+        child = famSim.add_person(p, len(p), rng.choice(["male", "female"]))
+        child.mother = mother
+        child.father = mother.spouse
+        mother.add_child(child)
+        mother.spouse.add_child(child)
+        assert kinship(p) == legacy_kinship(p)
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar"])
+def test_explicit_relatives_survive_recomputation(engine):
+    p = founders(engine, 6)
+    p[0].add_uncle(p[1])
+    p[0].add_sibling(p[5])
+    p[0].add_grandparent(p[4])
+    p[0].father = p[2]
+    p[0].mother = p[3]
+    p[2].add_child(p[0])
+    p[3].add_child(p[0])
+    child = famSim.add_person(p, 6, "female")
+    child.father = p[2]
+    child.mother = p[3]
+    p[2].add_child(child)
+    p[3].add_child(child)
+    assert names(p[0].siblings) == [6, 5]
+    assert names(p[5].siblings) == [0]
+    assert names(p[0].uncles) == [1]
+    assert names(getattr(p[0], "grandmother" if p[4].gender == "female" else "grandfather")) == [4]
+    assert names(p[6].siblings) == [0]
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar"])
+def test_fill_kinship_keeps_explicit_relatives(engine):
+    p = simulated(engine, 1)
+    p[-1].add_cousin(p[0])
+    expected = kinship(p)
+    famSim.fill_kinship(p)
+    assert kinship(p) == expected
+    assert p[0].name in names(p[-1].cousins)
@@ -0,0 +1,68 @@
+import random
+
+from simulation_api_stubs import RelationshipGraph, RelationType
+
+
+SPOUSE, PARENT = RelationType.SPOUSE, RelationType.PARENT
+
+
+def test_queries_return_metadata_dicts_in_first_added_order():
+    g = RelationshipGraph()
+    g.add_relationship(1, 2, SPOUSE, start_time=0.0)
+    g.add_relationship(1, 3, PARENT, start_time=1.0)
+    g.add_relationship(1, 4, SPOUSE, start_time=2.0, note="second")
+    g.add_relationship(1, 2, PARENT, start_time=3.0)
+    g.end_relationship(1, 2, SPOUSE, 1.5)
+    assert g.get_outbound(1) == [(2, SPOUSE, {'start_time': 0.0, 'end_time': 1.5}),
+                                 (2, PARENT, {'start_time': 3.0}),
+                                 (3, PARENT, {'start_time': 1.0}),
+                                 (4, SPOUSE, {'start_time': 2.0, 'note': "second"})]
+    assert g.get_outbound(1, SPOUSE) == [(2, SPOUSE, {'start_time': 0.0, 'end_time': 1.5}),
+                                         (4, SPOUSE, {'start_time': 2.0, 'note': "second"})]
+    assert g.get_inbound(2) == [(1, SPOUSE, {'start_time': 0.0, 'end_time': 1.5}),
+                                (1, PARENT, {'start_time': 3.0})]
+
+
+def test_readding_replaces_in_place():
+    g = RelationshipGraph()
+    g.add_relationship(1, 2, SPOUSE, start_time=0.0)
+    g.add_relationship(1, 3, SPOUSE, start_time=1.0)
+    g.end_relationship(1, 2, SPOUSE, 2.0)
+    g.add_relationship(1, 2, SPOUSE, start_time=5.0)
+    assert g.get_outbound(1, SPOUSE) == [(2, SPOUSE, {'start_time': 5.0}), (3, SPOUSE, {'start_time': 1.0})]
+    # Every path lists relationships in the order first added, whether or
+    # not later edges exist.
+    assert [other for other, _, _ in g.get_outbound(1, SPOUSE, active_at_time=9.0)] == [2, 3]
+    assert [other for other, _, _ in g.get_outbound(1, SPOUSE, active_at_time=5.0)] == [2, 3]
+    g.add_relationship(7, 8, PARENT, start_time=20.0)
+    assert [other for other, _, _ in g.get_outbound(1, SPOUSE, active_at_time=9.0)] == [2, 3]
+    assert [other for other, _, _ in g.get_outbound(1, SPOUSE, active_at_time=1.5)] == [3]
+
+
+def test_now_queries_follow_ends():
+    g = RelationshipGraph()
+    for other in range(2, 6):
+        g.add_relationship(1, other, SPOUSE, start_time=float(other))
+    for other in (3, 5, 2, 4):
+        g.end_relationship(1, other, SPOUSE, 10.0 + other)
+        open_now = [o for o, _, _ in g.get_outbound(1, SPOUSE, active_at_time=20.0)]
+        assert open_now == [o for o, _, meta in g.get_outbound(1, SPOUSE) if 'end_time' not in meta]
+    assert g.get_inbound(4, SPOUSE, active_at_time=20.0) == []
+    assert len(g.snapshot(12.5)) == 3
+
+
+def test_now_queries_match_the_general_path():
+    rng = random.Random(3)
+    g = RelationshipGraph()
+    t = 0.0
+    for _ in range(3000):
+        t += rng.choice([0.0, 1.0])
+        a, b, rel = rng.randrange(8), rng.randrange(8), rng.choice([SPOUSE, PARENT])
+        if rng.random() < 0.5:
+            g.add_relationship(a, b, rel, start_time=t)
+        else:
+            g.end_relationship(a, b, rel, t)
+        for person in range(8):
+            for query in (g.get_outbound, g.get_inbound):
+                expected = [match for match in query(person, rel) if 'end_time' not in match[2]]
+                assert query(person, rel, active_at_time=t + 1) == expected
@@ -0,0 +1,40 @@
+from collections import Counter
+
+import pytest
+
+from simulation_event_implementation import ResourceStressCheckEvent
+
+
+@pytest.fixture
+def stressed(v5_simulation):
+    sim = v5_simulation(founders=300)
+    sim.run(max_time=5 * 365)
+    return sim, ResourceStressCheckEvent(sim.time)
+
+
+@pytest.mark.parametrize("fraction", [0.1, 0.4, 0.9])
+def test_victims_are_distinct_living_people(stressed, fraction):
+    sim, event = stressed
+    n = int(len(sim.alive_ids) * fraction)
+    victims = event._select_victims(sim, n)
+    assert len(victims) == len(set(victims)) == n
+    assert set(victims) <= set(sim.alive_ids)
+
+
+def test_samplers_agree_either_side_of_the_switch(stressed):
+    # n = a fifth of the living uses rejection sampling, one more uses keys;
+    # each weight class must be hit at about the same rate by both.
+    sim, event = stressed
+    weights = {pid: event._weight(sim, pid) for pid in sim.alive_ids}
+    sizes = Counter(weights.values())
+    assert len(sizes) > 1
+    rates = []
+    for n in (len(weights) // 5, len(weights) // 5 + 1):
+        hits = Counter()
+        sim.rng.seed(0)
+        for _ in range(400):
+            hits.update(weights[pid] for pid in event._select_victims(sim, n))
+        rates.append({weight: hits[weight] / (400 * size) for weight, size in sizes.items()})
+    for weight in sizes:
+        assert rates[0][weight] == pytest.approx(rates[1][weight], abs=0.05)
+    assert rates[0][max(sizes)] > 2 * rates[0][min(sizes)]
@@ -0,0 +1,14 @@
+import famSim
+
+
+def test_worker_counts_below_one_run_serially():
+    # 0 and negative counts used to make empty batches forever.
+    results = [famSim.search_trials(0.32, 0.1, steps=60, seed=3, workers=workers, n_best=2, n_trials=3)
+               for workers in (1, 0, -2)]
+    assert len(results[0]) == 2
+    assert results[0] == results[1] == results[2]
+
+
+def test_first_accepted_search_with_zero_workers_stops():
+    summaries = famSim.search_trials(0.32, 0.1, steps=60, seed=3, workers=0, n_trials=4)
+    assert len(summaries) <= 1
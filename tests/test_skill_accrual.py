@@ -0,0 +1,98 @@
+import pytest
+
+import simulation_api_stubs as api
+from simulation_api_stubs import Event, RelationType, Simulation
+from simulation_event_implementation import SkillTransferEvent
+
+CONFIG = {"professions": {"farmer": {"skill_name": "farming", "good_produced": "food",
+                                     "base_units_per_year": 120.0}}}
+
+
+def apprenticeship(sim, master_id, apprentice_id, ticks):
+    # What CareerMarketEvent does for a match, in either accrual mode.
+    sim.relationships.add_relationship(master_id, apprentice_id, RelationType.APPRENTICE, start_time=sim.time)
+    if sim.skill_accrual == "lazy":
+        sim.start_accrual(apprentice_id, master_id, "farming", sim.time, 91.25, ticks,
+                          SkillTransferEvent.hours_gained)
+    else:
+        sim.schedule_recurring(SkillTransferEvent(sim.time, apprentice_id, master_id, "farmer"),
+                               91.25, occurrences=ticks, fixed_priority=True)
+
+
+class StartApprenticeship(Event):
+    def __init__(self, time, master_id, apprentice_id, ticks):
+        super().__init__(time)
+        self.master_id, self.apprentice_id, self.ticks = master_id, apprentice_id, ticks
+
+    def execute(self, sim):
+        apprenticeship(sim, self.master_id, self.apprentice_id, self.ticks)
+
+
+class Pause(Event):
+    # Lets run() stop exactly at its time in both modes.
+    def execute(self, sim):
+        pass
+
+
+def chain(mode, starts):
+    """Person 1 masters 2 from starts[0]; 2 masters 3 from starts[1] and 3
+    masters 4 from starts[2], each while still an apprentice itself."""
+    sim = Simulation(seed=1, skill_accrual=mode)
+    sim.community.load_config(CONFIG)
+    for person_id, aptitude in zip(range(1, 5), (1.0, 1.25, 0.8, 1.1)):
+        person = api.Person(id=person_id, gender="male", birth_time=-20 * 365)
+        person.aptitudes["farming"] = aptitude
+        sim.population[person_id] = person
+        sim.add_person_to_indices(person)
+    sim.population[1].skill_hours["farming"] = 2000.0
+    for master_id, start in zip(range(1, 4), starts):
+        sim.schedule(StartApprenticeship(start, master_id, master_id + 1, 16))
+    sim.schedule(Pause(2 * 365))
+    return sim
+
+
+def hours(sim, order):
+    return {person_id: sim.population[person_id].skill_hours.get("farming") for person_id in order}
+
+
+@pytest.mark.parametrize("starts", [(0.5, 365.5, 730.5), (0.5, 91.75, 400.0), (730.5, 365.5, 0.5)])
+@pytest.mark.parametrize("order", [(2, 3, 4), (4, 3, 2)])
+def test_nested_lazy_accruals_match_ticks(starts, order):
+    # Settling any link of the chain must replay its master's and its
+    # apprentices' ticks in between, as the tick events interleave.
+    results = {}
+    for mode in ("tick", "lazy"):
+        sim = chain(mode, starts)
+        sim.run(max_time=2 * 365)
+        middle = hours(sim, order)
+        sim.run(max_time=8 * 365)
+        results[mode] = (middle, hours(sim, order))
+    assert results["lazy"] == results["tick"]
+
+
+class Probe(Event):
+    def __init__(self, time, person_id):
+        super().__init__(time)
+        self.person_id = person_id
+
+    def execute(self, sim):
+        sim.probes.append(sim.population[self.person_id].skill_hours.get("farming"))
+
+
+class ProbedApprenticeship(Event):
+    # Reads 2's hours a year on, when a tick falls, from an event queued
+    # before the apprenticeship and from one queued after it.
+    def execute(self, sim):
+        sim.schedule(Probe(self.time + 365, 2))
+        apprenticeship(sim, 1, 2, 8)
+        sim.schedule(Probe(self.time + 365, 2))
+
+
+@pytest.mark.parametrize("mode", ["tick", "lazy"])
+def test_same_time_tick_fires_between_events_queued_around_it(mode):
+    sim = chain(mode, (5000.0,) * 3)
+    sim.probes = []
+    sim.schedule(ProbedApprenticeship(0.5))
+    sim.run(max_time=3 * 365)
+    before, after = sim.probes
+    assert after == before + SkillTransferEvent.hours_gained(sim, 2, 1, "farming")
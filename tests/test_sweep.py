@@ -0,0 +1,50 @@
+import sweep
+from sweep import Branch
+
+BRANCHES = [Branch('baseline'), Branch('birth=0.4', birth_prob=0.4),
+            Branch('infant=0.1', infant_mortality=0.1), Branch('k=0.5', k_conversion_factor=0.5),
+            Branch('food=150', economy={'consumption': {'food': 150.0}}), Branch('seed=7', seed=7)]
+
+
+def without_timing(rows):
+    return [{key: value for key, value in row.items() if key != 'seconds'} for row in rows]
+
+
+def test_unchanged_branch_continues_the_uninterrupted_run(v5_simulation):
+    sim = v5_simulation(founders=150)
+    sim.run(max_time=40 * 365)
+    start = sweep.snapshot_counts(sim)
+    uninterrupted = v5_simulation(founders=150)
+    uninterrupted.run(max_time=80 * 365)
+
+    row, = sweep.run_sweep(sim, [Branch('baseline')], (80 * 365 - sim.time) / 365, workers=1)
+    expected = sweep.branch_metrics(uninterrupted, start)
+    assert {key: row[key] for key in expected} == expected
+    assert row['born'] > 0 and row['died'] > 0
+
+
+def test_rows_do_not_depend_on_worker_count(v5_simulation):
+    sim = v5_simulation(founders=150)
+    sim.run(max_time=30 * 365)
+    serial = sweep.run_sweep(sim, BRANCHES, 30, workers=1)
+    parallel = sweep.run_sweep(sim, BRANCHES, 30, workers=3)
+    assert without_timing(serial) == without_timing(parallel)
+    assert [row['name'] for row in serial] == [branch.name for branch in BRANCHES]
+    # The branches really differ from each other.
+    assert len({tuple(sorted(row.items())) for row in without_timing(serial)}) > 1
+
+
+def test_economy_branch_requalifies_practitioners(v5_simulation):
+    sim = v5_simulation(founders=150)
+    sim.debug_aggregates = True
+    sim.run(max_time=30 * 365)
+    assert sim.qualified_by_profession['blacksmith']
+    economy = {'professions': {'blacksmith': {'building_required': 'workshop'},
+                               'farmer': {'skill_name': 'carpentry'}}}
+    # The economy events cross-check the aggregates after the switch.
+    row, = sweep.run_sweep(sim, [Branch('moved', economy=economy)], 20, workers=1)
+    assert row['born'] > 0
+
+    Branch('moved', economy=economy).apply(sim)
+    sim.check_profession_aggregates()
+    assert not sim.qualified_by_profession['blacksmith']
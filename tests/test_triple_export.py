@@ -0,0 +1,97 @@
+import io
+import json
+import random
+import re
+import struct
+
+import pytest
+
+import famSim
+from triple_export import RELATIONS, SINKS, BinarySink, TextSink, export_triples, iter_triples
+
+
+def born(steps=80):
+    # Everyone but the founders, whose parents are placeholders.
+    random.seed(1)
+    p, _ = famSim.run_trial(0.6, 0.2, steps=steps)
+    return p[8:]
+
+
+def test_report_goes_to_stderr_at_call_time(capsys):
+    # capsys replaces sys.stderr after triple_export was imported.
+    p = born()
+    count = export_triples(p, TextSink(io.StringIO()))
+    assert "exported %d triples" % count in capsys.readouterr().err
+
+
+def test_report_false_is_silent(capsys):
+    p = born()
+    export_triples(p, TextSink(io.StringIO()), report=False)
+    assert capsys.readouterr().err == ""
+
+
+def decoded(people):
+    # famSim's original export: decode each person's create_family_json.
+    for person in people:
+        family = json.loads(famSim.create_family_json(person))
+        for relation, value in family.items():
+            for obj in value if isinstance(value, list) else [value]:
+                yield obj, relation, family["name"]
+
+
+def export(p, format):
+    stream = io.BytesIO() if format == "binary" else io.StringIO()
+    count = export_triples(p, SINKS[format](stream), report=False)
+    return count, stream.getvalue()
+
+
+def read_binary(data):
+    assert data[:5] == BinarySink.MAGIC + bytes([BinarySink.VERSION])
+    length, = struct.unpack_from("<H", data, 5)
+    relations = data[7:7 + length].decode().split("\n")
+    genders = ("male", "female")
+    triples = []
+    for obj, relation, subject in BinarySink.record.iter_unpack(data[7 + length:]):
+        relation = relations[relation]
+        triples.append((genders[obj] if relation == "gender" else obj, relation, subject))
+    return triples
+
+
+READERS = {
+    "text": lambda data: [tuple(re.fullmatch(r"(.*) , _ (\w+) _ , (.*)", line).groups())
+                          for line in data.splitlines()],
+    "tsv": lambda data: [tuple(line.split("\t")) for line in data.splitlines()],
+    "jsonl": lambda data: [tuple(json.loads(line)) for line in data.splitlines()],
+    "binary": read_binary,
+}
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar"])
+def test_iter_triples_matches_decoded_family_json(engine):
+    random.seed(1)
+    p, _ = famSim.run_trial(0.6, 0.2, steps=150, engine=engine)
+    p = [p[i] for i in range(8, len(p))]
+    triples = list(iter_triples(p))
+    assert len(triples) > 1000
+    assert triples == list(decoded(p))
+    assert {relation for _, relation, _ in triples} == set(RELATIONS)
+
+
+def test_text_sink_writes_the_original_print_lines():
+    p = born(150)
+    lines = io.StringIO()
+    for obj, relation, subject in decoded(p):
+        print(obj, ", _", relation, "_ ,", subject, file=lines)
+    assert export(p, "text")[1] == lines.getvalue()
+
+
+@pytest.mark.parametrize("format", sorted(READERS))
+def test_sinks_round_trip(format):
+    p = born(150)
+    triples = list(iter_triples(p))
+    count, data = export(p, format)
+    assert count == len(triples)
+    if format in ("text", "tsv"):
+        # Text formats carry every field as a string.
+        triples = [tuple(map(str, triple)) for triple in triples]
+    assert READERS[format](data) == triples
@@ -0,0 +1,147 @@
+"""
+Streaming (object, relation, subject) export for famSim populations.
+
+iter_triples walks Person (or PersonView) attributes directly and yields
+the same triples, in the same order, as decoding create_family_json would,
+without building any intermediate JSON.  Sinks consume the stream in
+batches:
+
+  TextSink    famSim's original "object , _ relation _ , subject" lines
+  TSVSink     object<TAB>relation<TAB>subject lines
+  JSONLSink   one [object, relation, subject] array per line
+  BinarySink  compact fixed-width edge records (see BinarySink)
+"""
+
+import json
+import struct
+import sys
+import time
+
+# Relation names in create_family_json key order.
+RELATIONS = ("name", "gender", "birth_year", "death_year", "spouse", "father",
+             "mother", "grandfather", "grandmother", "children", "siblings",
+             "cousins", "aunts", "uncles", "nephews", "nieces")
+
+# Relations held as lists of people; the attribute has the relation's name.
+_LIST_RELATIONS = RELATIONS[7:]
+
+
+def iter_triples(people):
+    """Yield (object, relation, subject) for every fact about each person."""
+    for person in people:
+        name = person.name
+        yield name, "name", name
+        yield person.gender, "gender", name
+        yield person.birthyear, "birth_year", name
+        if person.deathyear:
+            yield person.deathyear, "death_year", name
+        if person.spouse:
+            yield person.spouse.name, "spouse", name
+        if person.father:
+            yield person.father.name, "father", name
+        if person.mother:
+            yield person.mother.name, "mother", name
+        for relation in _LIST_RELATIONS:
+            for relative in getattr(person, relation):
+                yield relative.name, relation, name
+
+
+class TripleSink:
+    """Writes triples to a stream, formatting and flushing them in batches."""
+
+    batch_size = 4096
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def format(self, triples):
+        raise NotImplementedError
+
+    def write(self, triples):
+        """Consume an iterable of triples; return how many were written."""
+        count = 0
+        batch = []
+        for triple in triples:
+            batch.append(triple)
+            if len(batch) == self.batch_size:
+                self.stream.write(self.format(batch))
+                count += len(batch)
+                batch = []
+        if batch:
+            self.stream.write(self.format(batch))
+            count += len(batch)
+        return count
+
+    def close(self):
+        self.stream.flush()
+
+
+class TextSink(TripleSink):
+    def format(self, triples):
+        return "".join("%s , _ %s _ , %s\n" % triple for triple in triples)
+
+
+class TSVSink(TripleSink):
+    def format(self, triples):
+        return "".join("%s\t%s\t%s\n" % triple for triple in triples)
+
+
+class JSONLSink(TripleSink):
+    def format(self, triples):
+        # Relations are plain identifiers and subjects are names, so only
+        # string objects (genders) need full JSON encoding.
+        dumps = json.dumps
+        return "".join('[%s, "%s", %s]\n' % (dumps(obj) if isinstance(obj, str) else obj, relation, subject)
+                       for obj, relation, subject in triples)
+
+
+class BinarySink(TripleSink):
+    """Fixed-width little-endian edge list on a binary stream.
+
+    Header: b"FTEB", a version byte, then the relation names (RELATIONS) as
+    a uint16 length-prefixed, newline-joined UTF-8 string.  Each record is
+    int32 object, uint8 relation index, int32 subject; gender objects are
+    coded 0 for male and 1 for female.
+    """
+
+    MAGIC = b"FTEB"
+    VERSION = 1
+    record = struct.Struct("<iBi")
+    _relation_ids = {relation: i for i, relation in enumerate(RELATIONS)}
+    _genders = {"male": 0, "female": 1}
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        names = "\n".join(RELATIONS).encode()
+        stream.write(self.MAGIC + bytes([self.VERSION]) + struct.pack("<H", len(names)) + names)
+
+    def format(self, triples):
+        out = bytearray(self.record.size * len(triples))
+        pack_into, size = self.record.pack_into, self.record.size
+        relation_ids, genders = self._relation_ids, self._genders
+        for k, (obj, relation, subject) in enumerate(triples):
+            if relation == "gender":
+                obj = genders[obj]
+            pack_into(out, k * size, obj, relation_ids[relation], subject)
+        return out
+
+
+SINKS = {"text": TextSink, "tsv": TSVSink, "jsonl": JSONLSink, "binary": BinarySink}
+
+
+def export_triples(people, sink, report=None):
+    """Stream every triple for people into sink and report throughput.
+
+    The report goes to report, or to sys.stderr as it is at call time when
+    None; pass False for no report.
+    """
+    start = time.perf_counter()
+    count = sink.write(iter_triples(people))
+    sink.close()
+    elapsed = time.perf_counter() - start
+    if report is not False:
+        if report is None:
+            report = sys.stderr
+        rate = count / elapsed if elapsed > 0 else float("inf")
+        print("exported %d triples in %.3fs (%.0f edges/sec)" % (count, elapsed, rate), file=report)
+    return count
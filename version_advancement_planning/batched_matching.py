@@ -0,0 +1,148 @@
+"""
+Batched apprenticeship matching for the v5.0 simulation (REQ-NF-005).
+
+BatchedFamilyPreferenceMatching scores every (youth, master) pair of a
+profession as one NumPy matrix instead of calling
+FamilyPreferenceMatching._calculate_score per pair:
+
+  kinship  100 if the master is a parent of the youth, else 50 if they
+           share a parent (from padded parent-index arrays)
+  skill    master skill hours / 1000
+  aptitude youth aptitude * 10
+           (both read as columns of sim.skills)
+  noise    sim.rng.random() * 0.1, drawn in one batch
+
+The noise is drawn from sim.rng in the same (profession, youth, master)
+order and the scores are summed in the same order, and ranking is a
+stable descending sort. So the matches, and the RNG state left behind,
+are identical to FamilyPreferenceMatching under a fixed seed. Instead of
+sorting every pair, the greedy assignment ranks them in chunks: it
+selects the top scores with argpartition and only sorts further when the
+chunk runs out before the slots are filled.
+
+Usage:
+    sim.matchmaking_strategy = BatchedFamilyPreferenceMatching()
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from simulation_api_stubs import Simulation, MatchmakingStrategy
+
+
+class BatchedFamilyPreferenceMatching(MatchmakingStrategy):
+    """FamilyPreferenceMatching with NumPy scoring and chunked ranking."""
+
+    # Pairs ranked per chunk, as a multiple of the open slots.
+    chunk_factor = 4
+
+    def match(
+        self,
+        candidates: List[int],
+        masters_by_profession: Dict[str, List[int]],
+        slots_by_profession: Dict[str, int],
+        sim: Simulation
+    ) -> List[Tuple[int, int, str]]:
+
+        youth_parents = self._parent_index(candidates, sim)
+        blocks = []
+        for profession in slots_by_profession:
+            masters = masters_by_profession.get(profession, [])
+            if candidates and masters:
+                blocks.append((profession, masters, self._score_matrix(
+                    candidates, youth_parents, masters, profession, sim)))
+        if not blocks:
+            return []
+
+        scores = np.concatenate([block[2].ravel() for block in blocks])
+        starts = np.cumsum([0] + [block[2].size for block in blocks])
+
+        matches = []
+        assigned_youth = set()
+        assigned_masters = defaultdict(int)
+        remaining_slots = slots_by_profession.copy()
+        open_slots = sum(slots for slots in remaining_slots.values() if slots > 0)
+        chunk = max(1, self.chunk_factor * open_slots)
+
+        for index in self._ranked(scores, chunk):
+            if not open_slots or len(assigned_youth) == len(candidates):
+                break
+            b = int(np.searchsorted(starts, index, side='right')) - 1
+            profession, masters, _ = blocks[b]
+            youth_i, master_i = divmod(int(index - starts[b]), len(masters))
+            youth, master = candidates[youth_i], masters[master_i]
+
+            if youth in assigned_youth: continue
+            if remaining_slots.get(profession, 0) <= 0: continue
+
+            prof_data = sim.community.profession_data[profession]
+            if assigned_masters[master] >= prof_data.max_apprentices_per_master:
+                continue
+
+            matches.append((youth, master, profession))
+            assigned_youth.add(youth)
+            assigned_masters[master] += 1
+            remaining_slots[profession] -= 1
+            open_slots -= 1
+
+        return matches
+
+    def _parent_index(self, person_ids: List[int], sim: Simulation) -> np.ndarray:
+        """(len(person_ids), k) array of parent ids, padded with -1."""
+        parents = [sim.get_kinship(pid)[0] for pid in person_ids]
+        width = max((len(p) for p in parents), default=0)
+        index = np.full((len(person_ids), max(width, 1)), -1, dtype=np.int64)
+        for row, p in enumerate(parents):
+            index[row, :len(p)] = sorted(p)
+        return index
+
+    def _score_matrix(
+        self,
+        candidates: List[int],
+        youth_parents: np.ndarray,
+        masters: List[int],
+        profession: str,
+        sim: Simulation
+    ) -> np.ndarray:
+        """(youth, master) scores, summed in _calculate_score's order."""
+        prof_data = sim.community.profession_data[profession]
+        skill = prof_data.skill_name
+        master_ids = np.array(masters, dtype=np.int64)
+        master_parents = self._parent_index(masters, sim)
+
+        is_parent = (youth_parents[:, :, None] == master_ids[None, None, :]).any(axis=1)
+        shares_parent = ((youth_parents[:, None, :, None] == master_parents[None, :, None, :]) &
+                         (youth_parents[:, None, :, None] >= 0)).any(axis=(2, 3))
+        kinship = np.where(is_parent, 100.0, np.where(shares_parent, 50.0, 0.0))
+
+        # Straight from the SkillRegistry columns; NaN means no entry.
+        # Masters still owed lazy apprenticeship hours are settled first.
+        for master in sim.skills.pending.intersection(masters):
+            sim.settle_skill_hours(master)
+        col = sim.skills.skill_index(skill)
+        master_skill = np.nan_to_num(sim.skills.skill_hours[master_ids, col], nan=0.0)
+        aptitude = np.nan_to_num(sim.skills.aptitudes[np.array(candidates, dtype=np.int64), col], nan=1.0)
+        random = sim.rng.random
+        noise = np.array([random() for _ in range(len(candidates) * len(masters))], dtype=float)
+
+        score = kinship + master_skill[None, :] / 1000
+        score += (aptitude * 10)[:, None]
+        score += noise.reshape(len(candidates), len(masters)) * 0.1
+        return score
+
+    def _ranked(self, scores: np.ndarray, chunk: int):
+        """Yield indices of scores in stable descending order, chunk by chunk."""
+        rest = np.arange(scores.size)
+        while rest.size:
+            if rest.size > chunk:
+                # Everything at or above the chunk-th largest score, ties
+                # included, is exactly the next prefix of the full ranking.
+                cut = scores[rest[np.argpartition(-scores[rest], chunk - 1)[chunk - 1]]]
+                top = scores[rest] >= cut
+                head, rest = rest[top], rest[~top]
+            else:
+                head, rest = rest, rest[:0]
+            yield from head[np.argsort(-scores[head], kind='stable')]
+            chunk *= 2
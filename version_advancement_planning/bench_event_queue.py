@@ -0,0 +1,85 @@
+"""
+Microbenchmark for the Simulation scheduler backends (EVENT_QUEUES).
+
+Runs the same hold-model workload on every backend: pop the next event,
+then schedule what the v5.0 events would, i.e. annual checks a year out,
+28 quarterly SkillTransferEvents per apprenticeship, an InheritanceEvent
+0.1 days after a death and deaths ~65 years out. Reports events/sec and
+checks that every backend pops the events in the same order. Each rate
+is the best of `repeat` runs, timed with the garbage collector paused.
+
+Usage: python bench_event_queue.py [n_events] [queue_size] [repeat]
+"""
+
+import gc
+import random
+import sys
+import time
+
+import simulation_api_stubs
+from simulation_api_stubs import EVENT_QUEUES, Event
+
+
+class BenchEvent(Event):
+    def execute(self, sim):
+        pass
+
+
+def workload(n_events, queue_size, seed=1):
+    """Precomputed (delay, n_follow_ups) plan so every backend sees the same events."""
+    rng = random.Random(seed)
+    initial = [rng.uniform(0, 365 * 80) for _ in range(queue_size)]
+    steps = []
+    for _ in range(n_events):
+        r = rng.random()
+        if r < 0.02:
+            # New apprenticeship: quarterly skill transfers for 7 years.
+            steps.append([q * 91.25 for q in range(1, 29)])
+        elif r < 0.30:
+            steps.append([365.0])
+        elif r < 0.40:
+            steps.append([0.1, rng.gauss(65, 10) * 365])
+        elif r < 0.70:
+            steps.append([rng.gauss(65, 10) * 365])
+        else:
+            steps.append([])
+    return initial, steps
+
+
+def run(queue_name, initial, steps):
+    # Same event priorities for every backend.
+    simulation_api_stubs._event_counter = 0
+    queue = EVENT_QUEUES[queue_name]()
+    for t in initial:
+        queue.push(BenchEvent(t))
+    order = []
+    gc.disable()
+    start = time.perf_counter()
+    for delays in steps:
+        if not len(queue):
+            break
+        event = queue.pop()
+        order.append(event.priority)
+        for delay in delays:
+            queue.push(BenchEvent(event.time + delay))
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return len(order) / elapsed, order
+
+
+if __name__ == '__main__':
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    queue_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    initial, steps = workload(n_events, queue_size)
+
+    baseline = None
+    reference = None
+    for name in EVENT_QUEUES:
+        runs = [run(name, initial, steps) for _ in range(repeat)]
+        rate, order = max(runs, key=lambda result: result[0])
+        if reference is None:
+            baseline, reference = rate, order
+        elif order != reference:
+            print(f"{name}: pop order differs from {next(iter(EVENT_QUEUES))}")
+        print(f"{name:>9}: {rate:12,.0f} events/sec  ({rate / baseline:.2f}x)")
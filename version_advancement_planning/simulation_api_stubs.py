@@ -10,14 +10,27 @@ the project's ML research goals (Project Context doc, Sec 7.1).
 3.  'remove_all_relationships_for_person' is REMOVED.
 4.  Graph queries ('get_outbound', 'get_inbound') now support
     an 'active_at_time' parameter for temporal filtering.
+
+Requires NumPy: SkillRegistry keeps every Simulation's aptitudes and skill
+hours as arrays (see requirements.txt).
 """
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set, Tuple, Callable
+from dataclasses import dataclass, field, replace
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Callable
 from enum import Enum
-from heapq import heappush, heappop
+from heapq import heappush, heappop, heapify, merge
+from bisect import bisect_right
+from itertools import count
+from math import floor
 from collections import defaultdict
+from collections.abc import MutableMapping
+import mmap
+import os
+import pickle
 import random
+import struct
+
+import numpy as np
 
 
 # ============================================================================
@@ -43,6 +56,151 @@ class Person:
         return self.death_time is None or self.death_time > current_time
 
 
+class SkillRegistry:
+    """
+    Skill names mapped to column indices, with aptitudes and skill hours
+    stored as float matrices whose rows are person ids. NaN marks a skill
+    a person has no entry for, so each row behaves like the old dict.
+    Simulation.add_person_to_indices attaches a person, after which
+    Person.aptitudes and Person.skill_hours are SkillRow views onto it.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.skill_names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.aptitudes = np.full((capacity, 0), np.nan)
+        self.skill_hours = np.full((capacity, 0), np.nan)
+        self.n_rows = 0
+        # skill-name tuple -> column array, for inherit_aptitudes
+        self._columns: Dict[Tuple[str, ...], np.ndarray] = {}
+        # Rows with skill hours still to settle (see Simulation.start_accrual);
+        # reading such a row through a SkillRow calls settle(row) first.
+        self.pending: Set[int] = set()
+        self.settle: Optional[Callable[[int], None]] = None
+
+    def skill_index(self, skill: str) -> int:
+        """Column of skill, adding one if it is new."""
+        col = self.index.get(skill)
+        if col is None:
+            col = self.index[skill] = len(self.skill_names)
+            self.skill_names.append(skill)
+            pad = np.full((self.aptitudes.shape[0], 1), np.nan)
+            self.aptitudes = np.hstack((self.aptitudes, pad))
+            self.skill_hours = np.hstack((self.skill_hours, pad))
+        return col
+
+    def reserve(self, person_id: int):
+        """Make sure row person_id exists."""
+        if person_id >= self.aptitudes.shape[0]:
+            rows = max(person_id + 1, 2 * self.aptitudes.shape[0])
+            for name in ('aptitudes', 'skill_hours'):
+                old = getattr(self, name)
+                new = np.full((rows, old.shape[1]), np.nan)
+                new[:old.shape[0]] = old
+                setattr(self, name, new)
+        self.n_rows = max(self.n_rows, person_id + 1)
+
+    def attach(self, person: Person):
+        """Move the person's skill dicts into the matrices and replace them with views."""
+        self.reserve(person.id)
+        for name in ('aptitudes', 'skill_hours'):
+            values = getattr(person, name)
+            if isinstance(values, SkillRow):
+                continue
+            row = SkillRow(self, name, person.id)
+            for skill, value in values.items():
+                row[skill] = value
+            setattr(person, name, row)
+
+    def add_hours(self, person_id: int, skill: str, hours: float):
+        col = self.skill_index(skill)
+        current = self.skill_hours[person_id, col]
+        self.skill_hours[person_id, col] = hours if current != current else current + hours
+
+    def inherit_aptitudes(self, child_id: int, mother_id: int, father_id: int,
+                          skills: List[str], rng: random.Random, sd: float = 0.15):
+        """
+        child aptitude = clip(parent mean + gauss(0, sd), 0.5, 1.5) for each
+        of skills, missing parent aptitudes counting as 1.0. One gauss draw per
+        entry, in order, so seeded runs match the per-skill loop it replaces.
+        """
+        key = tuple(skills)
+        cols = self._columns.get(key)
+        if cols is None:
+            cols = self._columns[key] = np.array([self.skill_index(skill) for skill in skills], dtype=np.intp)
+        gauss = rng.gauss
+        noise = np.array([gauss(0, sd) for _ in key])
+        self.reserve(child_id)
+        apt = self.aptitudes
+        mean = (apt[mother_id].take(cols) + apt[father_id].take(cols))
+        if np.isnan(mean).any():
+            mean = np.where(np.isnan(apt[mother_id].take(cols)), 1.0, apt[mother_id].take(cols)) + \
+                   np.where(np.isnan(apt[father_id].take(cols)), 1.0, apt[father_id].take(cols))
+        mean /= 2
+        mean += noise
+        apt[child_id, cols] = np.minimum(np.maximum(mean, 0.5), 1.5)
+
+    def aptitude_table(self) -> Tuple[List[str], np.ndarray]:
+        """(skill names, read-only person x skill view); no copy is made."""
+        return self.skill_names, self._table(self.aptitudes)
+
+    def skill_hours_table(self) -> Tuple[List[str], np.ndarray]:
+        return self.skill_names, self._table(self.skill_hours)
+
+    def _table(self, matrix: np.ndarray) -> np.ndarray:
+        view = matrix[:self.n_rows]
+        view.flags.writeable = False
+        return view
+
+
+class SkillRow(MutableMapping):
+    """Dict-like view of one person's row in a SkillRegistry matrix."""
+    __slots__ = ('registry', 'matrix', 'row')
+
+    def __init__(self, registry: SkillRegistry, matrix: str, row: int):
+        self.registry = registry
+        self.matrix = matrix
+        self.row = row
+
+    def _values(self) -> np.ndarray:
+        registry = self.registry
+        if self.row in registry.pending and self.matrix == 'skill_hours':
+            registry.settle(self.row)
+        return getattr(registry, self.matrix)[self.row]
+
+    def __getitem__(self, skill: str) -> float:
+        col = self.registry.index.get(skill)
+        value = self._values()[col] if col is not None else np.nan
+        if value != value:
+            raise KeyError(skill)
+        return float(value)
+
+    def get(self, skill: str, default=None):
+        col = self.registry.index.get(skill)
+        if col is None:
+            return default
+        value = self._values()[col]
+        return default if value != value else float(value)
+
+    def __setitem__(self, skill: str, value: float):
+        col = self.registry.skill_index(skill)
+        self._values()[col] = value
+
+    def __delitem__(self, skill: str):
+        self[skill]
+        self._values()[self.registry.index[skill]] = np.nan
+
+    def __iter__(self):
+        values = self._values()
+        return (name for name, value in zip(self.registry.skill_names, values) if value == value)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self._values())))
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
 # ============================================================================
 # LAYER 2: RELATIONSHIP GRAPH (Temporal Refactor)
 # ============================================================================
@@ -51,24 +209,174 @@ class RelationType(Enum):
     """Typed relationships between agents."""
     PARENT = "parent"
     PARTNER = "partner"
+    SPOUSE = "spouse"
     APPRENTICE = "apprentice"
 
 
+class Edge(MutableMapping):
+    """
+    One relationship, shared by both directions of the graph.
+    It is the relationship's metadata mapping ('start_time', 'end_time'
+    and any extra keywords given to add_relationship): it reads, writes and
+    compares like the metadata dict it replaces, so query results keep the
+    same (person, rel_type, metadata) tuples.
+    """
+    __slots__ = ('source', 'target', 'rel_type', 'start_time', 'end_time', 'extra', 'seq')
+
+    def __init__(
+        self,
+        source: int,
+        target: int,
+        rel_type: RelationType,
+        start_time: float,
+        end_time: Optional[float] = None,
+        **extra
+    ):
+        self.source = source
+        self.target = target
+        self.rel_type = rel_type
+        self.start_time = start_time
+        self.end_time = end_time
+        self.extra = extra or None
+        # Order in which (source, target, rel_type) was first added; kept
+        # when the relationship is re-added (see RelationshipGraph).
+        self.seq = 0
+
+    def __getitem__(self, key: str):
+        if key == 'start_time':
+            return self.start_time
+        if key == 'end_time':
+            if self.end_time is None:
+                raise KeyError(key)
+            return self.end_time
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key: str, value):
+        if key in ('start_time', 'end_time'):
+            setattr(self, key, value)
+        elif self.extra is None:
+            self.extra = {key: value}
+        else:
+            self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key == 'start_time':
+            raise KeyError(f"{key} is required")
+        if key == 'end_time':
+            if self.end_time is None:
+                raise KeyError(key)
+            self.end_time = None
+        elif self.extra is None:
+            raise KeyError(key)
+        else:
+            del self.extra[key]
+
+    def __iter__(self):
+        yield 'start_time'
+        if self.end_time is not None:
+            yield 'end_time'
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return 1 + (self.end_time is not None) + len(self.extra or ())
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def as_dict(self) -> dict:
+        """The metadata as a plain dict."""
+        meta = {'start_time': self.start_time}
+        if self.end_time is not None:
+            meta['end_time'] = self.end_time
+        if self.extra:
+            meta.update(self.extra)
+        return meta
+
+    def __repr__(self) -> str:
+        return f"Edge({self.source}->{self.target} {self.rel_type.name} {self.as_dict()})"
+
+
+class _EdgeGroup(dict):
+    """
+    One person's relationships of one type in one direction: {other -> Edge}
+    in the order first added. Also tracks which of them are open, for "now"
+    queries. open is None while no edge of the group has ended (all are
+    open) or once all of them have; otherwise it is {other -> Edge} of the
+    open ones, in the group's order too, so "now" queries list edges as
+    the filtered general path would.
+    """
+    __slots__ = ('ended', 'open')
+
+    def __init__(self):
+        super().__init__()
+        self.ended = 0
+        self.open = None
+
+    def open_edges(self) -> dict:
+        if self.open is not None:
+            return self.open
+        return self if not self.ended else {}
+
+    def opened(self, other: int, edge: Edge):
+        """Record that edge, to other, is now open (new, re-added or replaced)."""
+        if self.open is not None:
+            if other in self.open or not self.open or next(reversed(self.open.values())).seq < edge.seq:
+                self.open[other] = edge
+            else:
+                # Re-opened ahead of later open edges: keep group order.
+                self.open[other] = edge
+                self.open = dict(sorted(self.open.items(), key=lambda item: item[1].seq))
+        elif self.ended:
+            self.open = {other: edge}
+
+    def closed(self, other: int):
+        """Record that the edge to other has ended (ended already counts it)."""
+        if self.open is not None:
+            self.open.pop(other, None)
+            if not self.open:
+                self.open = None
+        elif self.ended == 1:
+            # The first edge of the group to end: the rest are still open.
+            self.open = {o: edge for o, edge in self.items() if o != other} or None
+
+
 class RelationshipGraph:
     """
     High-performance, non-destructive temporal graph (v5.0).
     Relationships are never deleted, only timestamped with an 'end_time'.
+    Each relationship is a single Edge record shared by both directions.
     """
+
+    # Ended edges per block of the snapshot index (see snapshot).
+    SNAPSHOT_BLOCK = 64
     
     def __init__(self):
-        # person_a -> {person_b -> {rel_type -> metadata}}
-        self.forward: Dict[int, Dict[int, Dict[RelationType, dict]]] = defaultdict(
-            lambda: defaultdict(dict)
-        )
-        # person_b -> {person_a -> {rel_type -> metadata}}
-        self.reverse: Dict[int, Dict[int, Dict[RelationType, dict]]] = defaultdict(
-            lambda: defaultdict(dict)
-        )
+        # Keyed by type so that typed queries cost O(typed degree)
+        # (REQ-NF-002), and typed "now" queries O(open typed degree).
+        # person_a -> {rel_type -> {person_b -> Edge}}
+        self.forward: Dict[int, Dict[RelationType, _EdgeGroup]] = {}
+        # person_b -> {rel_type -> {person_a -> Edge}}
+        self.reverse: Dict[int, Dict[RelationType, _EdgeGroup]] = {}
+        self._seq = count()
+        # Latest start or end time recorded. At or after it, the edges
+        # active are exactly the open ones.
+        self._latest_time: float = float('-inf')
+        # Sorted start/end arrays for snapshot() at earlier times; rebuilt
+        # on demand after the graph changes.
+        self._intervals = None
     
     def add_relationship(
         self, 
@@ -80,13 +388,32 @@ class RelationshipGraph:
         """
         Add directed relationship from person_a to person_b.
         'start_time' MUST be provided in metadata by the calling Event.
+        A relationship of the same type between the same people is replaced,
+        keeping its place in query results.
         """
         if 'start_time' not in metadata:
             # This is a programmatic error if this happens.
             raise ValueError(f"start_time missing for relationship {rel_type} {person_a}->{person_b}")
-            
-        self.forward[person_a][person_b][rel_type] = metadata
-        self.reverse[person_b][person_a][rel_type] = metadata
+
+        edge = Edge(person_a, person_b, rel_type, **metadata)
+        old = self._find(person_a, person_b, rel_type)
+        edge.seq = next(self._seq) if old is None else old.seq
+        for index, person, other in ((self.forward, person_a, person_b),
+                                     (self.reverse, person_b, person_a)):
+            group = self._group(index, person, rel_type)
+            group[other] = edge
+            was_open = old is not None and old.end_time is None
+            if edge.end_time is None:
+                if old is not None and not was_open:
+                    group.ended -= 1
+                group.opened(other, edge)
+            elif old is None or was_open:
+                group.ended += 1
+                group.closed(other)
+        self._latest_time = max(self._latest_time, edge.start_time)
+        if edge.end_time is not None:
+            self._latest_time = max(self._latest_time, edge.end_time)
+        self._intervals = None
     
     def end_relationship(
         self, 
@@ -99,66 +426,139 @@ class RelationshipGraph:
         Ends an active relationship by adding an 'end_time' to its metadata.
         Does not delete the relationship.
         """
-        try:
-            self.forward[person_a][person_b][rel_type]['end_time'] = end_time
-            self.reverse[person_b][person_a][rel_type]['end_time'] = end_time
-        except KeyError:
-            # This can happen if an event tries to end a relationship
-            # that was already ended (e.g., duplicate calls).
-            # It's safe to ignore.
-            pass
+        edge = self._find(person_a, person_b, rel_type)
+        if edge is None:
+            # Never created. It's safe to ignore.
+            return
+        if edge.end_time is None:
+            for index, person, other in ((self.forward, person_a, person_b),
+                                         (self.reverse, person_b, person_a)):
+                group = index[person][rel_type]
+                group.ended += 1
+                group.closed(other)
+        # If it had already ended (e.g., duplicate calls), as before the
+        # latest end_time wins.
+        edge.end_time = end_time
+        self._latest_time = max(self._latest_time, end_time)
+        self._intervals = None
+
+    def _find(self, person_a: int, person_b: int, rel_type: RelationType) -> Optional[Edge]:
+        return self.forward.get(person_a, {}).get(rel_type, {}).get(person_b)
 
-    def _is_active(self, meta: dict, active_at_time: float) -> bool:
+    @staticmethod
+    def _group(index: dict, person: int, rel_type: RelationType) -> _EdgeGroup:
+        neighbors = index.get(person)
+        if neighbors is None:
+            neighbors = index[person] = {}
+        group = neighbors.get(rel_type)
+        if group is None:
+            group = neighbors[rel_type] = _EdgeGroup()
+        return group
+
+    def _is_active(self, edge: Edge, active_at_time: float) -> bool:
         """Helper to check if a relationship is active at a specific time."""
-        return (meta['start_time'] <= active_at_time and
-                (meta.get('end_time') is None or meta['end_time'] > active_at_time))
+        return (edge.start_time <= active_at_time and
+                (edge.end_time is None or edge.end_time > active_at_time))
+
+    def _get_edges(
+        self,
+        outbound: bool,
+        person_id: int,
+        rel_type: Optional[RelationType],
+        active_at_time: Optional[float]
+    ) -> List[Tuple[int, RelationType, Edge]]:
+        """Matches for person_id in one direction, optionally of one type."""
+        neighbors = (self.forward if outbound else self.reverse).get(person_id, {})
+        if rel_type is not None:
+            group = neighbors.get(rel_type)
+            if group is None:
+                return []
+            if active_at_time is not None and active_at_time >= self._latest_time:
+                # "Now" query: only the open edges need to be looked at.
+                return [(other, rel_type, edge) for other, edge in group.open_edges().items()]
+            matches = [(other, rel_type, edge) for other, edge in group.items()]
+        else:
+            matches = [(other, rtype, edge) for rtype, group in neighbors.items()
+                       for other, edge in group.items()]
+            if len(neighbors) > 1:
+                # As one person -> {other -> {rel_type -> metadata}} map
+                # would list them: by the first relationship with each
+                # other person, then by relationship.
+                first = {}
+                for other, _, edge in matches:
+                    first[other] = min(first.get(other, edge.seq), edge.seq)
+                matches.sort(key=lambda match: (first[match[0]], match[2].seq))
+        if active_at_time is not None:
+            matches = [match for match in matches if self._is_active(match[2], active_at_time)]
+        return matches
 
     def get_outbound(
         self, 
         person_id: int, 
         rel_type: Optional[RelationType] = None,
         active_at_time: Optional[float] = None
-    ) -> List[Tuple[int, RelationType, dict]]:
+    ) -> List[Tuple[int, RelationType, Edge]]:
         """
         Get relationships initiated by person.
         If 'active_at_time' is set, filters for active relationships.
         """
-        matches = []
-        for target, rels in self.forward.get(person_id, {}).items():
-            for rtype, meta in rels.items():
-                if rel_type is not None and rtype != rel_type:
-                    continue
-                
-                if active_at_time is None:
-                    # Return all (historical and active)
-                    matches.append((target, rtype, meta))
-                elif self._is_active(meta, active_at_time):
-                    # Return only active
-                    matches.append((target, rtype, meta))
-        return matches
+        return self._get_edges(True, person_id, rel_type, active_at_time)
     
     def get_inbound(
         self, 
         person_id: int, 
         rel_type: Optional[RelationType] = None,
         active_at_time: Optional[float] = None
-    ) -> List[Tuple[int, RelationType, dict]]:
+    ) -> List[Tuple[int, RelationType, Edge]]:
         """
         Get relationships pointing to person.
         If 'active_at_time' is set, filters for active relationships.
         """
-        matches = []
-        for source, rels in self.reverse.get(person_id, {}).items():
-            for rtype, meta in rels.items():
-                if rel_type is not None and rtype != rel_type:
-                    continue
-                
-                if active_at_time is None:
-                    matches.append((source, rtype, meta))
-                elif self._is_active(meta, active_at_time):
-                    matches.append((source, rtype, meta))
-        return matches
+        return self._get_edges(False, person_id, rel_type, active_at_time)
     
+    def snapshot(self, t: float) -> List[Tuple[int, int, RelationType, Edge]]:
+        """
+        All relationships active at time t, as (person_a, person_b, rel_type,
+        metadata) tuples in start_time order. Intended for exporters.
+        At or after the latest recorded time this reads the open edges.
+        Earlier times use start-sorted arrays, in which ended edges are
+        grouped into blocks that carry their latest end_time, so blocks that
+        ended before t are skipped.
+        """
+        start = lambda edge: (edge.start_time, edge.seq)
+        if t >= self._latest_time:
+            edges = sorted((edge for edge in self._all_edges(self.forward) if edge.end_time is None),
+                           key=start)
+        else:
+            if self._intervals is None:
+                self._intervals = self._build_intervals()
+            open_edges, open_starts, ended, ended_starts, block_ends = self._intervals
+            block = self.SNAPSHOT_BLOCK
+            stop = bisect_right(ended_starts, t)
+            matches = []
+            for i in range(0, stop, block):
+                if block_ends[i // block] > t:
+                    matches.extend(edge for edge in ended[i:min(i + block, stop)]
+                                   if edge.end_time > t)
+            edges = merge(open_edges[:bisect_right(open_starts, t)], matches, key=start)
+        return [(edge.source, edge.target, edge.rel_type, edge) for edge in edges]
+
+    @staticmethod
+    def _all_edges(index: dict):
+        return (edge for neighbors in index.values()
+                for typed in neighbors.values() for edge in typed.values())
+
+    def _build_intervals(self):
+        """Sorted start/end arrays behind snapshot() for past times."""
+        edges = sorted(self._all_edges(self.forward), key=lambda edge: (edge.start_time, edge.seq))
+        open_edges = [edge for edge in edges if edge.end_time is None]
+        ended = [edge for edge in edges if edge.end_time is not None]
+        block = self.SNAPSHOT_BLOCK
+        block_ends = [max(edge.end_time for edge in ended[i:i + block])
+                      for i in range(0, len(ended), block)]
+        return (open_edges, [edge.start_time for edge in open_edges],
+                ended, [edge.start_time for edge in ended], block_ends)
+
     def get_parents(self, person_id: int) -> List[int]:
         """Gets all (immutable) parents."""
         return [p[0] for p in self.get_inbound(person_id, RelationType.PARENT)]
@@ -236,6 +636,35 @@ class Community:
                     base_units_per_year=prof_data.base_units_per_year
                 )
                 
+    def update_config(self, config: dict):
+        """
+        Apply a partial configuration (same shape as load_config's) over the
+        loaded one, e.g. to change the economy of a running simulation.
+        Profession entries override only the fields they give.
+        """
+        for prof_name, data in config.get('professions', {}).items():
+            if prof_name in self.profession_data:
+                self.profession_data[prof_name] = replace(self.profession_data[prof_name], **data)
+            else:
+                self.profession_data[prof_name] = ProfessionData(**data)
+        
+        for good, units in config.get('consumption', {}).items():
+            if good in self.consumption:
+                self.consumption[good].units_per_capita_year = units
+            else:
+                self.consumption[good] = ConsumptionNeed(good=good, units_per_capita_year=units)
+        
+        for prof_name, prof_data in self.profession_data.items():
+            good = prof_data.good_produced
+            if good not in self.production:
+                self.production[good] = ProductionCapacity(
+                    profession=prof_name,
+                    good_produced=good,
+                    base_units_per_year=prof_data.base_units_per_year
+                )
+            elif self.production[good].profession == prof_name:
+                self.production[good].base_units_per_year = prof_data.base_units_per_year
+                
     def market_gap(self, good: str) -> float:
         """Calculate demand/supply ratio. >1 means shortage."""
         supply = (self.production[good].annual_output() 
@@ -257,6 +686,22 @@ _event_counter = 0
 
 class Event:
     """Base class for all simulation events."""
+
+    # Set by Simulation.schedule_recurring: days between firings, how
+    # many firings are left (None: until cancelled), and whether each
+    # firing keeps the event's priority.
+    period: Optional[float] = None
+    remaining: Optional[int] = None
+    fixed_priority: bool = False
+    cancelled: bool = False
+    # True while the event sits in Simulation.event_queue.
+    queued: bool = False
+    # True while it sits there cancelled and counted in Simulation.tombstones.
+    tombstone: bool = False
+    # The Simulation it was last scheduled on, whose pending_events cancel()
+    # drops it from.
+    scheduler: Optional['Simulation'] = None
+
     def __init__(self, time: float):
         global _event_counter
         self.time = time
@@ -266,6 +711,22 @@ class Event:
     def execute(self, sim: 'Simulation'):
         """Executes the event logic on the simulation state."""
         raise NotImplementedError
+
+    def participants(self) -> Tuple[int, ...]:
+        """
+        Ids of the people this event is pending for. Simulation cancels
+        it when any of them dies (see Simulation.cancel_person_events).
+        """
+        return ()
+
+    def cancel(self):
+        """
+        Stop this event, and any later recurrences, from firing. Use
+        Simulation.cancel for a queued event so it counts towards compaction.
+        """
+        self.cancelled = True
+        if self.queued and self.scheduler is not None:
+            self.scheduler._unregister(self)
     
     def __lt__(self, other):
         """Sorts by time, then by insertion priority."""
@@ -274,6 +735,234 @@ class Event:
         return self.time < other.time
 
 
+# --- Scheduler backends ---
+# Each queue has push(event), pop() -> event, len() and compact(), which
+# drops cancelled events and returns how many it dropped. They all pop in
+# (time, priority) order (REQ-NF-007). The tuple and calendar queues break
+# any remaining tie by push order.
+
+class HeapEventQueue:
+    """Heap of Event objects, ordered by Event.__lt__ (the v5.0 queue)."""
+
+    def __init__(self):
+        self._heap: List[Event] = []
+
+    def push(self, event: Event):
+        heappush(self._heap, event)
+
+    def pop(self) -> Event:
+        return heappop(self._heap)
+
+    def compact(self) -> int:
+        size = len(self._heap)
+        self._heap = [event for event in self._heap if not event.cancelled]
+        heapify(self._heap)
+        return size - len(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class TupleHeapEventQueue:
+    """
+    Heap of (time, priority, seq, event) tuples. Sift comparisons run on
+    the leading numbers in C instead of calling Event.__lt__.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, int, Event]] = []
+        self._seq = count()
+
+    def push(self, event: Event):
+        heappush(self._heap, (event.time, event.priority, next(self._seq), event))
+
+    def pop(self) -> Event:
+        return heappop(self._heap)[3]
+
+    def compact(self) -> int:
+        size = len(self._heap)
+        self._heap = [entry for entry in self._heap if not entry[3].cancelled]
+        heapify(self._heap)
+        return size - len(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class CalendarEventQueue:
+    """
+    Calendar queue: events bucketed by day (time // bucket_width), each
+    bucket a small tuple heap, with a heap of integer bucket keys on top.
+    Pushes into an existing day only sift within that day's events.
+    """
+
+    def __init__(self, bucket_width: float = 1.0):
+        self.bucket_width = bucket_width
+        self._buckets: Dict[int, List[Tuple[float, int, int, Event]]] = {}
+        self._days: List[int] = []
+        self._seq = count()
+        self._size = 0
+
+    def push(self, event: Event):
+        day = floor(event.time / self.bucket_width)
+        entry = (event.time, event.priority, next(self._seq), event)
+        bucket = self._buckets.get(day)
+        if bucket is None:
+            self._buckets[day] = [entry]
+            heappush(self._days, day)
+        else:
+            heappush(bucket, entry)
+        self._size += 1
+
+    def pop(self) -> Event:
+        day = self._days[0]
+        bucket = self._buckets[day]
+        entry = heappop(bucket)
+        if not bucket:
+            del self._buckets[day]
+            heappop(self._days)
+        self._size -= 1
+        return entry[3]
+
+    def compact(self) -> int:
+        size = self._size
+        for day in list(self._buckets):
+            bucket = [entry for entry in self._buckets[day] if not entry[3].cancelled]
+            if bucket:
+                heapify(bucket)
+                self._buckets[day] = bucket
+            else:
+                del self._buckets[day]
+        self._days = list(self._buckets)
+        heapify(self._days)
+        self._size = sum(len(bucket) for bucket in self._buckets.values())
+        return size - self._size
+
+    def __len__(self) -> int:
+        return self._size
+
+
+EVENT_QUEUES = {
+    "heap": HeapEventQueue,
+    "tuple": TupleHeapEventQueue,
+    "calendar": CalendarEventQueue,
+}
+
+
+@dataclass
+class QueueStats:
+    """Event-queue counters, kept by Simulation."""
+    scheduled: int = 0
+    executed: int = 0
+    cancelled: int = 0      # cancelled while queued
+    dead_pops: int = 0      # popped but skipped (cancelled or in the past)
+    compactions: int = 0
+    compacted: int = 0      # cancelled events removed by compaction
+    peak_size: int = 0
+
+
+# Every float is an integer multiple of 2**-1074, so sums of
+# exact_hours() are exact and do not depend on the order of addition.
+EXACT_HOURS_SHIFT = 1074
+
+def exact_hours(hours: float) -> int:
+    """hours as an integer count of 2**-1074."""
+    numerator, denominator = float(hours).as_integer_ratio()
+    return numerator << (EXACT_HOURS_SHIFT - denominator.bit_length() + 1)
+
+
+class Accrual:
+    """
+    An apprenticeship's skill gain, settled lazily instead of by ticking
+    events: 'ticks' gains of gain(sim, apprentice_id, master_id, skill),
+    every 'period' days from 'start'. 'done' ticks are already applied and
+    the next one falls at 'next_time'. 'priority' is the tie-breaker the
+    replaced SkillTransferEvent would have kept at every firing, so ticks
+    falling together with each other or with an event keep its order.
+    """
+    __slots__ = ('apprentice_id', 'master_id', 'skill', 'period', 'ticks',
+                 'gain', 'done', 'next_time', 'priority')
+
+    def __init__(self, apprentice_id: int, master_id: int, skill: str, start: float,
+                 period: float, ticks: int, gain: Callable[['Simulation', int, int, str], float],
+                 priority: int = 0):
+        self.apprentice_id = apprentice_id
+        self.master_id = master_id
+        self.skill = skill
+        self.period = period
+        self.ticks = ticks
+        self.gain = gain
+        self.done = 0
+        self.next_time = start
+        self.priority = priority
+
+
+# --- Checkpoint file format ---
+# CHECKPOINT_MAGIC, then a header (CHECKPOINT_HEADER: pickle offset and
+# length, buffer count) and one (offset, length) pair per buffer. The pickle
+# (protocol 5) holds the object graph; NumPy arrays are written out-of-band
+# as raw buffers aligned to CHECKPOINT_ALIGN bytes so they can be mapped
+# straight from the file on load.
+CHECKPOINT_MAGIC = b"FTSIMCK1"
+CHECKPOINT_HEADER = struct.Struct("<QQQ")
+CHECKPOINT_SECTION = struct.Struct("<QQ")
+CHECKPOINT_ALIGN = 64
+
+
+def write_checkpoint(path: str, state: object):
+    """Write state to path atomically (via a temporary file and rename)."""
+    buffers = []
+    payload = pickle.dumps(state, protocol=5, buffer_callback=buffers.append)
+    raw = [buffer.raw() for buffer in buffers]
+
+    offset = len(CHECKPOINT_MAGIC) + CHECKPOINT_HEADER.size + CHECKPOINT_SECTION.size * len(raw)
+    pickle_offset = offset
+    offset += len(payload)
+    sections = []
+    for data in raw:
+        offset += -offset % CHECKPOINT_ALIGN
+        sections.append((offset, data.nbytes))
+        offset += data.nbytes
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(CHECKPOINT_MAGIC)
+        f.write(CHECKPOINT_HEADER.pack(pickle_offset, len(payload), len(raw)))
+        for section in sections:
+            f.write(CHECKPOINT_SECTION.pack(*section))
+        f.write(payload)
+        for (start, _), data in zip(sections, raw):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_checkpoint(path: str, use_mmap: bool = True) -> object:
+    """
+    Read a write_checkpoint file; buffers are copy-on-write maps if use_mmap.
+    The object graph is unpickled, so a crafted file can run arbitrary
+    code: only read checkpoints from a trusted source.
+    """
+    with open(path, "rb") as f:
+        if use_mmap:
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+        else:
+            data = memoryview(bytearray(f.read()))
+    if bytes(data[:len(CHECKPOINT_MAGIC)]) != CHECKPOINT_MAGIC:
+        raise ValueError(f"{path} is not a simulation checkpoint")
+    pos = len(CHECKPOINT_MAGIC)
+    pickle_offset, pickle_len, n_buffers = CHECKPOINT_HEADER.unpack_from(data, pos)
+    pos += CHECKPOINT_HEADER.size
+    buffers = []
+    for _ in range(n_buffers):
+        start, length = CHECKPOINT_SECTION.unpack_from(data, pos)
+        pos += CHECKPOINT_SECTION.size
+        buffers.append(data[start:start + length])
+    return pickle.loads(data[pickle_offset:pickle_offset + pickle_len], buffers=buffers)
+
+
 # ============================================================================
 # LAYER 5: SIMULATION CONTROLLER
 # ============================================================================
@@ -281,9 +970,32 @@ class Event:
 class Simulation:
     """Main simulation controller."""
     
-    def __init__(self, seed: int = 42):
+    def __init__(self, seed: int = 42, event_queue: str = "tuple", skill_accrual: str = "tick"):
+        """
+        event_queue selects the scheduler backend from EVENT_QUEUES.
+        skill_accrual is "tick" (quarterly SkillTransferEvents) or "lazy"
+        (Accrual records settled on read, graduation or death).
+        """
+        if skill_accrual not in ("tick", "lazy"):
+            raise ValueError(f"unknown skill_accrual {skill_accrual!r}")
+        self.skill_accrual = skill_accrual
         self.time: float = 0.0
-        self.event_queue: List[Event] = []
+        # run() restarts the global tie-breaker counter only on its first call,
+        # so a run continued in pieces (or from a checkpoint) matches one long run.
+        self._started = False
+        self.event_queue = EVENT_QUEUES[event_queue]()
+        self.queue_stats = QueueStats()
+        # person id -> events pending for them (Event.participants)
+        self.pending_events: Dict[int, Set[Event]] = {}
+        # Events cancelled with cancel() still in the queue; compacted once there are at
+        # least compact_min of them and they exceed compact_ratio of the queue.
+        self.tombstones: int = 0
+        self.compact_min: int = 1024
+        self.compact_ratio: float = 0.25
+        # Demographic rates read by the annual events; sweeps vary them per branch.
+        self.base_birth_prob: float = 0.32        # ReproductionCheckEvent, before the parity damping
+        self.infant_mortality: float = 0.25       # InfantMortalityCheckEvent at age 1
+        self.k_conversion_factor: float = 0.2     # ResourceStressCheckEvent deaths per unit shortfall
         self.population: Dict[int, Person] = {}
         self.relationships = RelationshipGraph() # Now temporal (v5.0)
         self.community = Community()
@@ -298,11 +1010,43 @@ class Simulation:
         self.unmarried_males: Set[int] = set()
         self.unmarried_females: Set[int] = set()
         self.married_females: Set[int] = set()
+        # Ids of the living in an array for O(1) uniform sampling, with
+        # each id's position so deaths are an O(1) swap-remove.
+        self.alive_ids: List[int] = []
+        self._alive_pos: Dict[int, int] = {}
+        # gender -> birth year -> ids of the living born that year
+        self.cohorts: Dict[str, Dict[int, Set[int]]] = {'male': defaultdict(set), 'female': defaultdict(set)}
+        # person id -> (parents, grandparents); PARENT edges never change
+        self.kinship: Dict[int, Tuple[FrozenSet[int], FrozenSet[int]]] = {}
         self.alive_population_count: int = 0
         self.alive_male_count: int = 0
         self.alive_female_count: int = 0
+        # profession -> qualified practitioners (alive, and owning the
+        # required building, if any) and their total hours in its skill,
+        # as an exact exact_hours() sum so it is independent of the order
+        # hours arrive in. UpdateCommunityEconomyEvent reads these instead
+        # of rescanning.
+        self.qualified_by_profession: Dict[str, Set[int]] = defaultdict(set)
+        self.qualified_skill_hours: Dict[str, int] = defaultdict(int)
+        self._qualified_as: Dict[int, str] = {}
+        # Cross-check the running aggregates on every economy update.
+        self.debug_aggregates: bool = False
         
         self.matchmaking_strategy: Optional[MatchmakingStrategy] = None
+        # Aptitudes and skill hours of everyone added via add_person_to_indices.
+        self.skills = SkillRegistry()
+        self.skills.settle = self._settle_on_read
+        # Lazy apprenticeships: apprentice id -> Accruals, master id -> apprentices
+        self.accruals: Dict[int, List[Accrual]] = {}
+        self._accruals_by_master: Dict[int, Set[int]] = defaultdict(set)
+        # Priority of the event now running: lazy ticks due at the current
+        # time are settled only if they would have fired before it.
+        self._running_priority: float = -1
+        # True while an accrual's gain is computed (see _settle).
+        self._settling = False
+        # Set to a list to record each settled gain as a
+        # (time, apprentice_id, master_id, skill, hours) milestone for export.
+        self.skill_milestones: Optional[List[Tuple[float, int, int, str, float]]] = None
     
     def next_person_id(self) -> int:
         self._next_person_id += 1
@@ -312,33 +1056,175 @@ class Simulation:
         self._next_building_id += 1
         return self._next_building_id
     
-    def schedule(self, event: Event):
-        """Add event to priority queue."""
-        heappush(self.event_queue, event)
+    def schedule(self, event: Event) -> Event:
+        """Add event to priority queue; the event is its cancellation handle."""
+        self.event_queue.push(event)
+        event.queued = True
+        event.scheduler = self
+        for person_id in event.participants():
+            pending = self.pending_events.get(person_id)
+            if pending is None:
+                self.pending_events[person_id] = {event}
+            else:
+                pending.add(event)
+        stats = self.queue_stats
+        stats.scheduled += 1
+        if len(self.event_queue) > stats.peak_size:
+            stats.peak_size = len(self.event_queue)
+        return event
+
+    def cancel(self, event: Event):
+        """Cancel a scheduled event; it stays queued as a tombstone until popped or compacted."""
+        if event.cancelled:
+            return
+        event.cancel()
+        self._unregister(event)
+        if event.queued:
+            self.queue_stats.cancelled += 1
+            event.tombstone = True
+            self.tombstones += 1
+            if (self.tombstones >= self.compact_min and
+                    self.tombstones > self.compact_ratio * len(self.event_queue)):
+                self.compact()
+
+    def cancel_person_events(self, person_id: int):
+        """Cancel every pending event that involves person_id (e.g. on death)."""
+        for event in list(self.pending_events.get(person_id, ())):
+            self.cancel(event)
+
+    def compact(self):
+        """Remove cancelled events from the queue."""
+        self.queue_stats.compactions += 1
+        self.queue_stats.compacted += self.event_queue.compact()
+        self.tombstones = 0
+
+    def _unregister(self, event: Event):
+        for person_id in event.participants():
+            pending = self.pending_events.get(person_id)
+            if pending is not None:
+                pending.discard(event)
+                if not pending:
+                    del self.pending_events[person_id]
+
+    def schedule_recurring(self, event: Event, period: float, occurrences: Optional[int] = None,
+                           fixed_priority: bool = False) -> Event:
+        """
+        Fire event at event.time and then every 'period' days, reusing the
+        same object: 'occurrences' times in all, or until it is cancelled.
+        Each recurrence takes the next tie-breaker priority after it fires,
+        as a fresh copy scheduled at the end of execute() would; with
+        fixed_priority every firing keeps the event's own priority, as
+        copies all scheduled up front would.
+        """
+        event.period = period
+        event.remaining = occurrences
+        event.fixed_priority = fixed_priority
+        self.schedule(event)
+        return event
+
+    def _reschedule(self, event: Event):
+        """Queue the next firing of a recurring event."""
+        global _event_counter
+        if event.remaining is not None:
+            event.remaining -= 1
+            if event.remaining <= 0:
+                return
+        event.time += event.period
+        if not event.fixed_priority:
+            event.priority = _event_counter
+            _event_counter += 1
+        self.schedule(event)
     
-    def run(self, max_time: float):
-        """Run simulation until max_time or event queue empty."""
+    def run(self, max_time: float, checkpoint_path: Optional[str] = None,
+            checkpoint_every: Optional[float] = None):
+        """
+        Run simulation until max_time or event queue empty. With
+        checkpoint_path and checkpoint_every (days), save_checkpoint()
+        overwrites checkpoint_path every checkpoint_every simulated days,
+        between events, so a crashed run can resume from the last one.
+        """
         global _event_counter
-        _event_counter = 0
+        if not self._started:
+            _event_counter = 0
+            self._started = True
+        next_checkpoint = None
+        if checkpoint_path and checkpoint_every:
+            next_checkpoint = self.time + checkpoint_every
         
         try:
             while self.event_queue and self.time < max_time:
-                event = heappop(self.event_queue)
-                if event.time < self.time: continue 
+                event = self.event_queue.pop()
+                event.queued = False
+                if event.cancelled:
+                    # Events cancelled directly (Event.cancel) were never counted.
+                    if event.tombstone:
+                        event.tombstone = False
+                        self.tombstones -= 1
+                    self.queue_stats.dead_pops += 1
+                    continue
+                self._unregister(event)
+                if event.time < self.time:
+                    self.queue_stats.dead_pops += 1
+                    continue
                 self.time = event.time
+                self.queue_stats.executed += 1
+                self._running_priority = event.priority
                 event.execute(self)
+                if event.period is not None and not event.cancelled:
+                    self._reschedule(event)
+                if next_checkpoint is not None and self.time >= next_checkpoint:
+                    self.save_checkpoint(checkpoint_path)
+                    while next_checkpoint <= self.time:
+                        next_checkpoint += checkpoint_every
         except Exception as e:
             print(f"--- SIMULATION HALTED AT t={self.time} ---")
             print(f"Error during execution of event: {event.__class__.__name__}")
             print(f"Error: {e}")
             import traceback
             traceback.print_exc()
+        # Lazy accruals owe every tick up to the horizon the queue ran to.
+        for apprentice_id in list(self.accruals):
+            self.settle_skill_hours(apprentice_id, max_time, before=False)
+
+    # --- Checkpoint / restore ---
+
+    def save_checkpoint(self, path: str):
+        """
+        Write the whole simulation (population, graph, indices, community,
+        pending events, RNG state and the global event counter) to path in
+        the CHECKPOINT_MAGIC format. Call between events, e.g. via run().
+
+        A restore rebuilds sets with a different iteration order, so events
+        must not let set order reach the RNG: MarriageMarketEvent and
+        CareerMarketEvent walk their sets sorted. (Before checkpoints, they
+        walked them unsorted, so seeded results from then differ.)
+        """
+        write_checkpoint(path, {'simulation': self, 'event_counter': _event_counter})
+
+    @classmethod
+    def load_checkpoint(cls, path: str, use_mmap: bool = True) -> 'Simulation':
+        """
+        Restore a simulation saved by save_checkpoint. run() then continues it
+        exactly as the original run would have. With use_mmap the NumPy
+        arrays are copy-on-write maps of the file rather than copies.
+
+        Loading unpickles the file (see read_checkpoint), which can run
+        arbitrary code: never load a checkpoint from an untrusted source.
+        """
+        global _event_counter
+        state = read_checkpoint(path, use_mmap)
+        _event_counter = state['event_counter']
+        return state['simulation']
 
     # --- Index Maintenance Methods (Unchanged from v4.0) ---
     
     def add_person_to_indices(self, person: Person):
         """Add a new person to demographic indices."""
+        self.skills.attach(person)
         self.alive_population_count += 1
+        self._alive_pos[person.id] = len(self.alive_ids)
+        self.alive_ids.append(person.id)
+        self.cohorts[person.gender][floor(person.birth_time / 365)].add(person.id)
         if person.gender == 'male':
             self.alive_male_count += 1
             self.unmarried_males.add(person.id)
@@ -350,6 +1236,16 @@ class Simulation:
         """Remove a person from all indices upon death."""
         person_id = person.id
         self.alive_population_count -= 1
+        pos = self._alive_pos.pop(person_id)
+        last = self.alive_ids.pop()
+        if last != person_id:
+            self.alive_ids[pos] = last
+            self._alive_pos[last] = pos
+        cohort = self.cohorts[person.gender]
+        year = floor(person.birth_time / 365)
+        cohort[year].discard(person_id)
+        if not cohort[year]:
+            del cohort[year]
         if person.gender == 'male':
             self.alive_male_count -= 1
             self.unmarried_males.discard(person_id)
@@ -361,6 +1257,7 @@ class Simulation:
         if person_id in self.professions:
             prof = self.professions.pop(person_id)
             self.practitioners_by_profession[prof].discard(person_id)
+            self._update_qualification(person_id)
             
     def set_person_married(self, person_a_id: int, person_b_id: int):
         """Update demographic indices for marriage."""
@@ -383,12 +1280,208 @@ class Simulation:
             self.practitioners_by_profession[old_prof].discard(person_id)
         self.professions[person_id] = profession
         self.practitioners_by_profession[profession].add(person_id)
+        self._update_qualification(person_id)
+
+    def add_skill_hours(self, person_id: int, skill: str, hours: float):
+        """Add skill hours, keeping qualified_skill_hours in step."""
+        # Lazy apprentices of this master must see the hours they had.
+        for apprentice_id in list(self._accruals_by_master.get(person_id, ())):
+            self.settle_skill_hours(apprentice_id)
+        self._add_hours(person_id, skill, hours)
+
+    def _add_hours(self, person_id: int, skill: str, hours: float):
+        profession = self._qualified_as.get(person_id)
+        if profession is None or self.community.profession_data[profession].skill_name != skill:
+            self.skills.add_hours(person_id, skill, hours)
+            return
+        # Track the stored value's exact change, rounding included. Reads the
+        # matrix directly: a SkillRow read would settle, which lands here.
+        matrix, col = self.skills.skill_hours, self.skills.skill_index(skill)
+        before = matrix[person_id, col]
+        self.skills.add_hours(person_id, skill, hours)
+        after = self.skills.skill_hours[person_id, col]
+        self.qualified_skill_hours[profession] += exact_hours(after) - (0 if before != before else exact_hours(before))
+
+    # --- Lazy skill accrual ---
+
+    def start_accrual(self, apprentice_id: int, master_id: int, skill: str, start: float,
+                      period: float, ticks: int, gain: Callable[['Simulation', int, int, str], float]):
+        """
+        Record an apprenticeship's skill gain instead of scheduling a tick per
+        period. It takes the tie-breaker priority its SkillTransferEvent would.
+        """
+        global _event_counter
+        self.settle_skill_hours(apprentice_id)
+        accrual = Accrual(apprentice_id, master_id, skill, start, period, ticks, gain,
+                          _event_counter)
+        _event_counter += 1
+        self.accruals.setdefault(apprentice_id, []).append(accrual)
+        self._accruals_by_master[master_id].add(apprentice_id)
+        self.skills.pending.add(apprentice_id)
+
+    def settle_skill_hours(self, person_id: int, until: Optional[float] = None, before: bool = True):
+        """
+        Apply person_id's accrual ticks falling before 'until' (default: now),
+        or also those exactly at it if not 'before'. Ticks are applied one at
+        a time in the order the SkillTransferEvents they replace would have
+        fired: by time, then by priority. At the current time, 'before'
+        means before the event now running, so the ticks it would have
+        followed are applied and the ones it would have preceded are not.
+        """
+        until = self.time if until is None else until
+        if not before:
+            priority = float('inf')
+        else:
+            priority = self._running_priority if until == self.time else -1
+        self._settle(person_id, (until, priority))
+
+    def _settle(self, person_id: int, bound: Tuple[float, float]):
+        """Apply person_id's ticks whose (time, priority) is below bound."""
+        milestones = self.skill_milestones
+        while True:
+            accruals = self.accruals.get(person_id)
+            if not accruals:
+                return
+            accrual = min(accruals, key=lambda a: (a.next_time, a.priority))
+            tick = (accrual.next_time, accrual.priority)
+            if not tick < bound:
+                return
+            # Replay whatever fired before this tick in tick mode: the
+            # master's own ticks (the gain reads the master's hours) and
+            # this person's apprentices' ticks (they read this person's).
+            self._settle(accrual.master_id, tick)
+            for apprentice_id in list(self._accruals_by_master.get(person_id, ())):
+                self._settle(apprentice_id, tick)
+            self._settling = True
+            try:
+                hours = accrual.gain(self, person_id, accrual.master_id, accrual.skill)
+            finally:
+                self._settling = False
+            self._add_hours(person_id, accrual.skill, hours)
+            if milestones is not None:
+                milestones.append((accrual.next_time, person_id, accrual.master_id, accrual.skill, hours))
+            accrual.done += 1
+            accrual.next_time += accrual.period
+            if accrual.done >= accrual.ticks:
+                self._drop_accruals(person_id, [accrual])
+
+    def _settle_on_read(self, person_id: int):
+        # SkillRow reads settle the row to now, except the gain's own reads
+        # during a settlement, which has already brought them to the tick.
+        if not self._settling:
+            self.settle_skill_hours(person_id)
+
+    def settle_qualified_skill_hours(self):
+        """Settle lazy apprentices who already count towards qualified_skill_hours."""
+        for person_id in [pid for pid in self.skills.pending if pid in self._qualified_as]:
+            self.settle_skill_hours(person_id)
+
+    def end_accruals(self, person_id: int, time: float, master_id: Optional[int] = None):
+        """
+        Close accruals ending at 'time', settling the ticks before it: all
+        that person_id is part of (as apprentice or master), or with
+        master_id given, only person_id's apprenticeship to master_id.
+        """
+        if master_id is not None:
+            affected = [person_id]
+        else:
+            affected = [person_id] + list(self._accruals_by_master.get(person_id, ()))
+        for apprentice_id in affected:
+            accruals = self.accruals.get(apprentice_id)
+            if not accruals:
+                continue
+            self.settle_skill_hours(apprentice_id, time)
+            self._drop_accruals(apprentice_id, [
+                a for a in accruals if apprentice_id == person_id and master_id in (None, a.master_id)
+                or a.master_id == person_id])
+
+    def _drop_accruals(self, apprentice_id: int, dropped: List[Accrual]):
+        accruals = self.accruals.get(apprentice_id, [])
+        for accrual in dropped:
+            accruals.remove(accrual)
+            if not any(a.master_id == accrual.master_id for a in accruals):
+                apprentices = self._accruals_by_master[accrual.master_id]
+                apprentices.discard(apprentice_id)
+                if not apprentices:
+                    del self._accruals_by_master[accrual.master_id]
+        if not accruals:
+            self.accruals.pop(apprentice_id, None)
+            self.skills.pending.discard(apprentice_id)
+
+    def _update_qualification(self, person_id: int):
+        """Move person_id into or out of qualified_by_profession."""
+        profession = self.professions.get(person_id)
+        prof_data = self.community.profession_data.get(profession)
+        qualified = prof_data is not None and person_id in self._alive_pos
+        if qualified and prof_data.building_required:
+            qualified = any(b.type == prof_data.building_required
+                            for b in self.buildings_by_owner.get(person_id, []))
+        target = profession if qualified else None
+
+        current = self._qualified_as.get(person_id)
+        if current == target:
+            return
+        # Settle lazy hours now, under the old membership, not mid-move.
+        self.settle_skill_hours(person_id)
+        skill_hours = self.population[person_id].skill_hours
+        if current is not None:
+            members = self.qualified_by_profession[current]
+            members.discard(person_id)
+            del self._qualified_as[person_id]
+            skill = self.community.profession_data[current].skill_name
+            self.qualified_skill_hours[current] -= exact_hours(skill_hours.get(skill, 0.0))
+        if target is not None:
+            self.qualified_by_profession[target].add(person_id)
+            self._qualified_as[person_id] = target
+            self.qualified_skill_hours[target] += exact_hours(skill_hours.get(prof_data.skill_name, 0.0))
+
+    def update_economy(self, config: dict):
+        """
+        Apply a partial economy configuration (see Community.update_config)
+        and requalify every practitioner: a profession's required building or
+        skill may have changed under them.
+        """
+        # Settle lazy hours under the old membership, as _update_qualification does.
+        for person_id in list(self._qualified_as):
+            self.settle_skill_hours(person_id)
+        self.community.update_config(config)
+        self.qualified_by_profession.clear()
+        self.qualified_skill_hours.clear()
+        self._qualified_as.clear()
+        for person_id in self.professions:
+            self._update_qualification(person_id)
+
+    def mean_qualified_skill_hours(self, profession: str) -> float:
+        """Correctly rounded mean skill hours of the qualified practitioners."""
+        count = len(self.qualified_by_profession.get(profession, ()))
+        if not count:
+            return 0.0
+        return self.qualified_skill_hours[profession] / (count << EXACT_HOURS_SHIFT)
+
+    def check_profession_aggregates(self):
+        """Recompute the qualified-practitioner aggregates from scratch and compare."""
+        for profession, prof_data in self.community.profession_data.items():
+            qualified = set()
+            for pid in self.practitioners_by_profession.get(profession, set()):
+                if not self.population[pid].is_alive(self.time): continue
+                if prof_data.building_required:
+                    buildings = self.buildings_by_owner.get(pid, [])
+                    if not any(b.type == prof_data.building_required for b in buildings):
+                        continue
+                qualified.add(pid)
+            total = sum(exact_hours(self.get_skill_level(pid, prof_data.skill_name)) for pid in qualified)
+            running = self.qualified_skill_hours.get(profession, 0)
+            if qualified != self.qualified_by_profession.get(profession, set()):
+                raise AssertionError(f"{profession}: qualified practitioners out of sync")
+            if running != total:
+                raise AssertionError(f"{profession}: skill hours out of sync")
         
     def add_building(self, building: Building):
         """Update building indices."""
         self.community.buildings.append(building)
         if building.owner_id:
             self.buildings_by_owner[building.owner_id].append(building)
+            self._update_qualification(building.owner_id)
 
     def transfer_building_owner(self, building: Building, new_owner_id: Optional[int]):
         """Update building indices for inheritance."""
@@ -400,6 +1493,9 @@ class Simulation:
         building.owner_id = new_owner_id
         if new_owner_id:
             self.buildings_by_owner[new_owner_id].append(building)
+        for person_id in (old_owner_id, new_owner_id):
+            if person_id:
+                self._update_qualification(person_id)
 
     # --- Query API (Unchanged from v4.0) ---
     
@@ -407,6 +1503,38 @@ class Simulation:
         t = current_time if current_time is not None else self.time
         return [pid for pid, p in self.population.items() if p.is_alive(t)]
     
+    def alive_in_age_range(self, lo: float, hi: float, gender: Optional[str] = None,
+                           current_time: Optional[float] = None) -> List[int]:
+        """
+        Ids, in ascending order, of living people with lo <= age <= hi.
+        Reads only the birth-year cohorts that overlap the window (REQ-NF-003).
+        """
+        t = current_time if current_time is not None else self.time
+        first = floor((t - hi * 365) / 365)
+        last = floor((t - lo * 365) / 365)
+        result = []
+        for cohort in (self.cohorts.values() if gender is None else (self.cohorts[gender],)):
+            for year in range(first, last + 1):
+                ids = cohort.get(year)
+                if not ids:
+                    continue
+                if first < year < last:
+                    result.extend(ids)
+                else:
+                    population = self.population
+                    result.extend(pid for pid in ids if lo <= population[pid].age(t) <= hi)
+        result.sort()
+        return result
+
+    def get_kinship(self, person_id: int) -> Tuple[FrozenSet[int], FrozenSet[int]]:
+        """Cached (parents, grandparents) of a person, built from PARENT edges."""
+        kin = self.kinship.get(person_id)
+        if kin is None:
+            parents = frozenset(self.relationships.get_parents(person_id))
+            grandparents = frozenset(gp for p in parents for gp in self.get_kinship(p)[0])
+            kin = self.kinship[person_id] = (parents, grandparents)
+        return kin
+
     def get_skill_level(self, person_id: int, skill: str) -> float:
         if person_id not in self.population: return 0.0
         return self.population[person_id].skill_hours.get(skill, 0.0)
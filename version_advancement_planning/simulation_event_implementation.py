@@ -5,18 +5,19 @@ Version 5.0
 Implements all event classes specified in sim_design_v5.md.
 
 This version (v5.0) implements the temporal graph refactor:
-1.  Imports from 'sim_api_v5'.
+1.  Imports the v5.0 core API from 'simulation_api_stubs'.
 2.  DeathEvent now calls 'end_relationship' instead of 'remove_all'.
 3.  GraduateApprenticeshipEvent calls 'end_relationship'.
 4.  All 'add_relationship' calls include a 'start_time'.
 """
 
-from sim_api_v5 import (
+from simulation_api_stubs import (
     Simulation, Event, Person, Building, RelationType, 
     MatchmakingStrategy, ProfessionData
 )
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Set
 from collections import defaultdict
+import heapq
 import random
 import json
 
@@ -31,6 +32,9 @@ class BirthEvent(Event):
         super().__init__(time)
         self.mother_id = mother_id
         self.father_id = father_id
+
+    def participants(self):
+        return (self.mother_id, self.father_id)
     
     def execute(self, sim: 'Simulation'):
         mother = sim.population.get(self.mother_id)
@@ -41,7 +45,7 @@ class BirthEvent(Event):
             return
         
         partners = sim.relationships.get_outbound(self.mother_id, RelationType.SPOUSE, active_at_time=self.time)
-        if not partner or partner[0][0] != self.father_id:
+        if not partners or partners[0][0] != self.father_id:
             return
         
         # Calculate gender bias
@@ -68,17 +72,13 @@ class BirthEvent(Event):
         sim.relationships.add_relationship(
             self.father_id, child.id, RelationType.PARENT, start_time=self.time
         )
+        sim.get_kinship(child.id)  # PARENT edges are final; cache the ancestors now
         
         # Initialize aptitudes
-        for skill in sim.community.profession_data.keys():
-            skill_name = sim.community.profession_data[skill].skill_name
-            mother_apt = mother.aptitudes.get(skill_name, 1.0)
-            father_apt = father.aptitudes.get(skill_name, 1.0)
-            mean = (mother_apt + father_apt) / 2
-            noise = sim.rng.gauss(0, 0.15)
-            child.aptitudes[skill_name] = max(0.5, min(1.5, mean + noise))
-        
-        sim.schedule(InfantMortalityCheckEvent(self.time + 365, child.id, 0.25))
+        skills = [data.skill_name for data in sim.community.profession_data.values()]
+        sim.skills.inherit_aptitudes(child.id, self.mother_id, self.father_id, skills, sim.rng)
+        
+        sim.schedule(InfantMortalityCheckEvent(self.time + 365, child.id, sim.infant_mortality))
         death_age = sim.rng.gauss(65, 10)
         sim.schedule(DeathEvent(self.time + death_age * 365, child.id))
 
@@ -90,6 +90,9 @@ class InfantMortalityCheckEvent(Event):
         super().__init__(time)
         self.child_id = child_id
         self.probability = probability
+
+    def participants(self):
+        return (self.child_id,)
         
     def execute(self, sim: 'Simulation'):
         child = sim.population.get(self.child_id)
@@ -108,6 +111,9 @@ class DeathEvent(Event):
     def __init__(self, time: float, person_id: int):
         super().__init__(time)
         self.person_id = person_id
+
+    def participants(self):
+        return (self.person_id,)
     
     def execute(self, sim: 'Simulation'):
         person = sim.population.get(self.person_id)
@@ -116,6 +122,10 @@ class DeathEvent(Event):
         
         # 1. Set state
         person.death_time = self.time
+
+        # Drop this person's pending births, transfers, graduation, etc.
+        sim.cancel_person_events(self.person_id)
+        sim.end_accruals(self.person_id, self.time)
         
         # 2. Find heir & schedule inheritance (REQ-BU-004)
         heir_id = None
@@ -137,13 +147,13 @@ class DeathEvent(Event):
             self.person_id, RelationType.SPOUSE, active_at_time=self.time
         )
         for partner_id, _, _ in active_partners:
-            sim.relationships.end_relationship(self.person_id, pargner_id, RelationType.SPOUSE, self.time)
-            sim.relationships.end_relationship(pargner_id, self.person_id, RelationType.SPOUSE, self.time)
+            sim.relationships.end_relationship(self.person_id, partner_id, RelationType.SPOUSE, self.time)
+            sim.relationships.end_relationship(partner_id, self.person_id, RelationType.SPOUSE, self.time)
             
-            # Set living pargner to widowed
-            pargner = sim.population[pargner_id]
-            if pargner.is_alive(self.time):
-                sim.set_person_widowed(pargner_id, pargner.gender)
+            # Set living partner to widowed
+            partner = sim.population[partner_id]
+            if partner.is_alive(self.time):
+                sim.set_person_widowed(partner_id, partner.gender)
         
         # 3b. End APPRENTICE relationships (as master)
         active_apprentices = sim.relationships.get_outbound(
@@ -188,12 +198,15 @@ class InheritanceEvent(Event):
 
 
 class MarriageEvent(Event):
-    """Create temporal pargner relationship and update indices."""
+    """Create temporal partner relationship and update indices."""
     
     def __init__(self, time: float, person_a: int, person_b: int):
         super().__init__(time)
         self.person_a = person_a # Male
         self.person_b = person_b # Female
+
+    def participants(self):
+        return (self.person_a, self.person_b)
     
     def execute(self, sim: 'Simulation'):
         person_a = sim.population.get(self.person_a)
@@ -223,25 +236,22 @@ class ReproductionCheckEvent(Event):
         super().__init__(time)
         
     def execute(self, sim: 'Simulation'):
-        for person_id in list(sim.married_females):
-            person = sim.population[person_id]
-            
-            if not person.is_alive(self.time):
-                continue
-            if not (20 <= person.age(self.time) <= 50):
+        for person_id in sim.alive_in_age_range(20, 50, 'female', current_time=self.time):
+            if person_id not in sim.married_females:
                 continue
+            person = sim.population[person_id]
 
-            pargners = sim.relationships.get_outbound(person.id, RelationType.SPOUSE, active_at_time=self.time)
-            if not pargners:
+            partners = sim.relationships.get_outbound(person.id, RelationType.SPOUSE, active_at_time=self.time)
+            if not partners:
                 continue
             
-            pargner_id = pargners[0][0]
-            if not sim.population[pargner_id].is_alive(self.time):
+            partner_id = partners[0][0]
+            if not sim.population[partner_id].is_alive(self.time):
                 continue
                 
             children_count = len(sim.relationships.get_outbound(person.id, RelationType.PARENT))
             max_children = 8
-            base_prob = 0.32
+            base_prob = sim.base_birth_prob
             
             if children_count >= max_children:
                 continue
@@ -249,9 +259,7 @@ class ReproductionCheckEvent(Event):
             birth_prob = base_prob / (1.0 + 2.0 * children_count)
             
             if sim.rng.random() < birth_prob:
-                sim.schedule(BirthEvent(self.time, person.id, pargner_id))
-        
-        sim.schedule(ReproductionCheckEvent(self.time + 365))
+                sim.schedule(BirthEvent(self.time, person.id, partner_id))
 
 
 class MarriageMarketEvent(Event):
@@ -263,47 +271,64 @@ class MarriageMarketEvent(Event):
     def execute(self, sim: 'Simulation'):
         min_age = 20
         
-        males = [pid for pid in sim.unmarried_males 
+        # Sorted so the shuffles below do not depend on set layout, which a
+        # checkpoint restore does not preserve.
+        males = [pid for pid in sorted(sim.unmarried_males)
                  if sim.population[pid].is_alive(self.time) and 
                  sim.population[pid].age(self.time) >= min_age]
-        females = [pid for pid in sim.unmarried_females
+        females = [pid for pid in sorted(sim.unmarried_females)
                    if sim.population[pid].is_alive(self.time) and
                    sim.population[pid].age(self.time) >= min_age]
         
         sim.rng.shuffle(males)
         sim.rng.shuffle(females)
         
-        used_females = set()
+        # Index the candidates by parent and grandparent so each male's
+        # relatives are found by lookup instead of checking every pair.
+        by_parent = defaultdict(list)
+        by_grandparent = defaultdict(list)
+        for female_id in females:
+            parents, grandparents = sim.get_kinship(female_id)
+            for p in parents:
+                by_parent[p].append(female_id)
+            for gp in grandparents:
+                by_grandparent[gp].append(female_id)
+
+        # Unmatched females in shuffled order; taken ones are removed.
+        available = dict.fromkeys(females)
         for male_id in males:
-            for female_id in females:
-                if female_id in used_females: continue
-                
-                if self._is_related(sim, male_id, female_id):
+            related = self._relatives(sim, male_id, by_parent, by_grandparent)
+            for female_id in available:
+                if female_id in related:
                     continue
-                    
                 sim.schedule(MarriageEvent(self.time, male_id, female_id))
-                used_females.add(female_id)
+                del available[female_id]
                 break
-                
-        sim.schedule(MarriageMarketEvent(self.time + 365))
+
+    def _relatives(self, sim: 'Simulation', male_id: int, by_parent, by_grandparent) -> Set[int]:
+        """Females that _is_related would reject for male_id (REQ-DE-006)."""
+        parents, grandparents = sim.get_kinship(male_id)
+        related = set(parents)                          # his mother
+        for p in parents:
+            related.update(by_parent.get(p, ()))        # (half-)sisters
+            related.update(by_grandparent.get(p, ()))   # nieces
+        related.update(by_parent.get(male_id, ()))      # daughters
+        for gp in grandparents:
+            related.update(by_parent.get(gp, ()))       # aunts
+        return related
 
     def _is_related(self, sim: 'Simulation', male_id: int, female_id: int) -> bool:
         """Broadened incest check (REQ-DE-006)."""
-        male_parents = set(sim.relationships.get_parents(male_id))
-        female_parents = set(sim.relationships.get_parents(female_id))
-        
-        if male_parents and male_parents.intersection(female_parents):
+        male_parents, male_grandparents = sim.get_kinship(male_id)
+        female_parents, female_grandparents = sim.get_kinship(female_id)
+
+        if male_parents & female_parents:
             return True
         if male_id in female_parents or female_id in male_parents:
             return True
-            
-        male_grandparents = set(gp for p in male_parents for gp in sim.relationships.get_parents(p))
-        female_grandparents = set(gp for p in female_parents for gp in sim.relationships.get_parents(p))
-        
-        if (male_parents and male_parents.intersection(female_grandparents)) or \
-           (female_parents and female_parents.intersection(male_grandparents)):
+        if (male_parents & female_grandparents) or (female_parents & male_grandparents):
             return True
-            
+
         return False
 
 # ============================================================================
@@ -322,36 +347,23 @@ class UpdateCommunityEconomyEvent(Event):
         for good, need in sim.community.consumption.items():
             need.current_population = alive_pop_count
         
-        for profession, capacity in sim.community.production.items():
-            prof_data = sim.community.profession_data[profession]
-            skill_name = prof_data.skill_name
-            
-            potential_practitioners = sim.practitioners_by_profession.get(profession, set())
-            qualified_practitioners = []
-            
-            for pid in potential_practitioners:
-                person = sim.population[pid]
-                if not person.is_alive(self.time): continue
-                
-                if prof_data.building_required:
-                    buildings = sim.buildings_by_owner.get(pid, [])
-                    if any(b.type == prof_data.building_required for b in buildings):
-                        qualified_practitioners.append(pid)
-                else:
-                    qualified_practitioners.append(pid)
-                    
-            capacity.current_practitioners = len(qualified_practitioners)
+        # Running aggregates kept by Simulation: O(#professions) per year.
+        sim.settle_qualified_skill_hours()
+        if sim.debug_aggregates:
+            sim.check_profession_aggregates()
+        for good, capacity in sim.community.production.items():
+            profession = capacity.profession
+            practitioners = len(sim.qualified_by_profession.get(profession, ()))
+            capacity.current_practitioners = practitioners
             
-            if qualified_practitioners:
-                avg_hours = sim.get_avg_skill(qualified_practitioners, skill_name)
+            if practitioners:
+                avg_hours = sim.mean_qualified_skill_hours(profession)
                 capacity.avg_skill_multiplier = 1.0 + min(1.0, avg_hours / 20000.0)
             else:
                 capacity.avg_skill_multiplier = 1.0
         
         for good in sim.community.consumption.keys():
             sim.community.market_gaps[good] = sim.community.market_gap(good)
-        
-        sim.schedule(UpdateCommunityEconomyEvent(self.time + 365))
 
 
 class ResourceStressCheckEvent(Event):
@@ -370,37 +382,55 @@ class ResourceStressCheckEvent(Event):
                 max_shortfall_pct = max(max_shortfall_pct, shortfall_pct)
 
         if max_shortfall_pct == 0.0:
-            sim.schedule(ResourceStressCheckEvent(self.time + 365, self.critical_goods))
             return
             
-        K_CONVERSION_FACTOR = 0.2
-        n_to_remove = int(sim.alive_population_count * max_shortfall_pct * K_CONVERSION_FACTOR)
+        n_to_remove = int(sim.alive_population_count * max_shortfall_pct * sim.k_conversion_factor)
         
         if n_to_remove > 0:
-            candidates = [pid for pid, p in sim.population.items() if p.is_alive(self.time)]
-            victims = self._select_victims(sim, candidates, n_to_remove)
+            victims = self._select_victims(sim, n_to_remove)
             
             for person_id in victims:
                 sim.schedule(DeathEvent(self.time + sim.rng.random() * 0.1, person_id))
-        
-        sim.schedule(ResourceStressCheckEvent(self.time + 365, self.critical_goods))
 
-    def _select_victims(self, sim: Simulation, candidates: List[int], n: int) -> List[int]:
-        """Selects most vulnerable agents (REQ-EC-010)."""
-        if n >= len(candidates):
-            return candidates
-            
-        weighted = []
-        for pid in candidates:
-            person = sim.population[pid]
-            age = person.age(self.time)
-            weight = 1.0
-            if age < 5 or age > 60: weight *= 3.0
-            if pid not in sim.professions: weight *= 2.0
-            weighted.append((weight * sim.rng.random(), pid))
-            
-        weighted.sort(reverse=True, key=lambda x: x[0])
-        return [pid for _, pid in weighted[:n]]
+    def _weight(self, sim: Simulation, person_id: int) -> float:
+        age = sim.population[person_id].age(self.time)
+        weight = 1.0
+        if age < 5 or age > 60: weight *= 3.0
+        if person_id not in sim.professions: weight *= 2.0
+        return weight
+
+    def _select_victims(self, sim: Simulation, n: int) -> List[int]:
+        """
+        Selects most vulnerable agents (REQ-EC-010): n living people drawn
+        without replacement, each draw proportional to _weight. Draws are
+        uniform picks from sim.alive_ids kept with probability
+        weight / MAX_WEIGHT, so each victim costs O(1) expected picks
+        rather than a full scan while n is at most a fifth of the living
+        (always so for k_conversion_factor <= 0.2). Beyond that, repeat
+        picks dominate, so one pass keys everyone by
+        random() ** (1 / weight) and keeps the n largest keys, which
+        samples the same way (Efraimidis-Spirakis).
+        """
+        alive = sim.alive_ids
+        if n >= len(alive):
+            return list(alive)
+
+        rng = sim.rng
+        if 5 * n > len(alive):
+            keyed = [(rng.random() ** (1.0 / self._weight(sim, pid)), pid) for pid in alive]
+            return [pid for _, pid in heapq.nlargest(n, keyed)]
+
+        MAX_WEIGHT = 6.0 # 3.0 (age) * 2.0 (no profession)
+        chosen = set()
+        victims = []
+        while len(victims) < n:
+            pid = alive[rng.randrange(len(alive))]
+            if pid in chosen:
+                continue
+            if rng.random() * MAX_WEIGHT < self._weight(sim, pid):
+                chosen.add(pid)
+                victims.append(pid)
+        return victims
 
 
 class CareerMarketEvent(Event):
@@ -411,7 +441,6 @@ class CareerMarketEvent(Event):
         
     def execute(self, sim: 'Simulation'):
         if not sim.matchmaking_strategy:
-            sim.schedule(CareerMarketEvent(self.time + 365))
             return
             
         slots_by_profession = defaultdict(int)
@@ -432,17 +461,14 @@ class CareerMarketEvent(Event):
             if sim.rng.random() < probability:
                 slots_by_profession[profession] += 1
         
-        eligible_youth = []
-        for pid, person in sim.population.items():
-            if person.is_alive(self.time) \
-               and 16 <= person.age(self.time) <= 20 \
-               and pid not in sim.professions:
-                eligible_youth.append(pid)
+        eligible_youth = [pid for pid in sim.alive_in_age_range(16, 20, current_time=self.time)
+                          if pid not in sim.professions]
         
         available_masters = defaultdict(list)
         for prof_name in slots_by_profession:
             prof_data = sim.community.profession_data[prof_name]
-            for master_id in sim.practitioners_by_profession.get(prof_name, set()):
+            # Sorted, as in MarriageMarketEvent: set order does not survive a checkpoint.
+            for master_id in sorted(sim.practitioners_by_profession.get(prof_name, ())):
                 if not sim.population[master_id].is_alive(self.time): continue
                 
                 current_apprentices = len(sim.relationships.get_outbound(
@@ -471,17 +497,20 @@ class CareerMarketEvent(Event):
                 youth_id, master_id, profession
             ))
             
-            for quarter in range(duration * 4):
-                sim.schedule(SkillTransferEvent(
-                    self.time + quarter * 91.25,
-                    youth_id, master_id, profession
-                ))
+            if sim.skill_accrual == "lazy":
+                sim.start_accrual(
+                    youth_id, master_id, prof_data.skill_name, self.time,
+                    91.25, duration * 4, SkillTransferEvent.hours_gained
+                )
+            else:
+                sim.schedule_recurring(
+                    SkillTransferEvent(self.time, youth_id, master_id, profession),
+                    91.25, occurrences=duration * 4, fixed_priority=True
+                )
         
         for youth_id in eligible_youth:
             if youth_id not in matched_youth:
                 sim.set_person_profession(youth_id, 'farmer')
-                
-        sim.schedule(CareerMarketEvent(self.time + 365))
 
     def _find_profession_for_good(self, good: str, sim: 'Simulation') -> Optional[str]:
         for prof, data in sim.community.profession_data.items():
@@ -507,6 +536,9 @@ class SkillTransferEvent(Event):
         self.apprentice_id = apprentice_id
         self.master_id = master_id
         self.profession = profession
+
+    def participants(self):
+        return (self.apprentice_id, self.master_id)
     
     def execute(self, sim: 'Simulation'):
         apprentice = sim.population.get(self.apprentice_id)
@@ -514,25 +546,29 @@ class SkillTransferEvent(Event):
         
         if not apprentice or not master or \
            not apprentice.is_alive(self.time) or not master.is_alive(self.time):
+            self.cancel()
             return
         
         # Check if relationship is still active
         rels = sim.relationships.get_inbound(self.apprentice_id, RelationType.APPRENTICE, active_at_time=self.time)
         if not any(r[0] == self.master_id for r in rels):
+            self.cancel()
             return # Master died or apprenticeship ended
             
-        prof_data = sim.community.profession_data[self.profession]
-        skill = prof_data.skill_name
-        
+        skill = sim.community.profession_data[self.profession].skill_name
+        hours_gained = self.hours_gained(sim, self.apprentice_id, self.master_id, skill)
+        sim.add_skill_hours(self.apprentice_id, skill, hours_gained)
+
+    @staticmethod
+    def hours_gained(sim: 'Simulation', apprentice_id: int, master_id: int, skill: str) -> float:
+        """One quarter's hours; also the gain of lazy accruals (Simulation.start_accrual)."""
         base_hours = 520
-        aptitude = apprentice.aptitudes.get(skill, 1.0)
+        aptitude = sim.population[apprentice_id].aptitudes.get(skill, 1.0)
         
-        master_hours = master.skill_hours.get(skill, 0)
+        master_hours = sim.population[master_id].skill_hours.get(skill, 0)
         master_bonus = 1.0 + min(1.0, master_hours / 10000)
         
-        hours_gained = base_hours * aptitude * master_bonus
-        apprentice.skill_hours[skill] = \
-            apprentice.skill_hours.get(skill, 0) + hours_gained
+        return base_hours * aptitude * master_bonus
 
 
 class GraduateApprenticeshipEvent(Event):
@@ -552,9 +588,14 @@ class GraduateApprenticeshipEvent(Event):
         self.apprentice_id = apprentice_id
         self.master_id = master_id
         self.profession = profession
+
+    def participants(self):
+        # Not the master: the apprentice still graduates if the master dies.
+        return (self.apprentice_id,)
     
     def execute(self, sim: 'Simulation'):
         apprentice = sim.population.get(self.apprentice_id)
+        sim.end_accruals(self.apprentice_id, self.time, master_id=self.master_id)
         
         # End the relationship regardless of liveness to close graph
         sim.relationships.end_relationship(
@@ -704,6 +745,9 @@ def initialize_simulation(sim: Simulation, config_path: str):
             prof_data = sim.community.profession_data[data['prof']]
             person.skill_hours[prof_data.skill_name] = data['skill']
             sim.set_person_profession(person.id, data['prof'])
+    
+    # The founders' ids are fixed above; children are numbered after them.
+    sim._next_person_id = max(sim.population)
 
     sim.schedule(MarriageEvent(0.0, 1, 2))
     sim.schedule(MarriageEvent(0.0, 5, 6))
@@ -715,11 +759,12 @@ def initialize_simulation(sim: Simulation, config_path: str):
     
     sim.matchmaking_strategy = FamilyPreferenceMatching()
     
-    sim.schedule(UpdateCommunityEconomyEvent(0.1))
-    sim.schedule(ResourceStressCheckEvent(0.2))
-    sim.schedule(CareerMarketEvent(0.5))
-    sim.schedule(ReproductionCheckEvent(1.0))
-    sim.schedule(MarriageMarketEvent(1.5))
+    # Annual checks, each a single recurring event.
+    sim.schedule_recurring(UpdateCommunityEconomyEvent(0.1), 365)
+    sim.schedule_recurring(ResourceStressCheckEvent(0.2), 365)
+    sim.schedule_recurring(CareerMarketEvent(0.5), 365)
+    sim.schedule_recurring(ReproductionCheckEvent(1.0), 365)
+    sim.schedule_recurring(MarriageMarketEvent(1.5), 365)
 
 # ============================================================================
 # USAGE EXAMPLE
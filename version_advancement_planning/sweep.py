@@ -0,0 +1,210 @@
+"""
+Fork-from-checkpoint parameter sweeps for the v5.0 simulation.
+
+Every branch of a sweep shares the same history up to the end of a
+burn-in, so the burn-in is simulated once and snapshotted with
+Simulation.save_checkpoint. Each Branch then continues from that
+snapshot with its own parameters:
+
+  birth_prob           Simulation.base_birth_prob
+  infant_mortality     Simulation.infant_mortality
+  k_conversion_factor  Simulation.k_conversion_factor
+  economy              partial economy config for Simulation.update_economy
+  seed                 reseeds sim.rng (replicates of the same parameters)
+
+Parameters left as None keep the burn-in's values. A branch with no
+changes and no seed continues exactly as the uninterrupted run would.
+
+Where the 'fork' start method is available, each branch runs in a worker
+forked from the process holding the burn-in, so it starts from a
+copy-on-write image of it instead of deserializing the snapshot. The
+workers are never reused, so each branch starts from an untouched copy.
+Elsewhere, and with workers <= 1, each branch loads the snapshot file.
+Either way a branch's result does not depend on the number of workers.
+
+run_sweep returns one row (a flat dict) of end-of-branch metrics per
+branch, in branch order; format_table lays the rows out as text.
+
+Usage: python sweep.py <economy_config.json> [burn_in_years] [branch_years] [workers]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+from simulation_api_stubs import Simulation
+from simulation_event_implementation import initialize_simulation
+
+
+@dataclass
+class Branch:
+    name: str
+    birth_prob: Optional[float] = None
+    infant_mortality: Optional[float] = None
+    k_conversion_factor: Optional[float] = None
+    economy: Optional[dict] = None
+    seed: Optional[int] = None
+
+    def apply(self, sim: Simulation):
+        """Set this branch's parameters on a simulation restored from the burn-in."""
+        if self.birth_prob is not None:
+            sim.base_birth_prob = self.birth_prob
+        if self.infant_mortality is not None:
+            sim.infant_mortality = self.infant_mortality
+        if self.k_conversion_factor is not None:
+            sim.k_conversion_factor = self.k_conversion_factor
+        if self.economy is not None:
+            sim.update_economy(self.economy)
+        if self.seed is not None:
+            sim.rng.seed(self.seed)
+
+
+def burn_in(config_path: str, years: float, seed: int = 42, **kwargs) -> Simulation:
+    """Initialize a simulation from config_path and run it for years."""
+    sim = Simulation(seed=seed, **kwargs)
+    initialize_simulation(sim, config_path)
+    sim.run(max_time=years * 365)
+    return sim
+
+
+def branch_metrics(sim: Simulation, start: dict) -> Dict[str, object]:
+    """End-of-branch metrics, with births and deaths counted from start (snapshot_counts)."""
+    born = sim._next_person_id - start['next_person_id']
+    row = {
+        'years': (sim.time - start['time']) / 365.0,
+        'alive': sim.alive_population_count,
+        'male': sim.alive_male_count,
+        'female': sim.alive_female_count,
+        'born': born,
+        'died': start['alive'] + born - sim.alive_population_count,
+    }
+    for profession in sorted(sim.community.profession_data):
+        row[f'practitioners:{profession}'] = len(sim.qualified_by_profession.get(profession, ()))
+    for good in sorted(sim.community.market_gaps):
+        row[f'gap:{good}'] = sim.community.market_gaps[good]
+    return row
+
+
+def snapshot_counts(sim: Simulation) -> dict:
+    return {'time': sim.time, 'alive': sim.alive_population_count,
+            'next_person_id': sim._next_person_id}
+
+
+def run_branch(sim: Simulation, branch: Branch, max_time: float) -> Dict[str, object]:
+    """Continue a restored burn-in under branch's parameters to max_time; return its row."""
+    start = snapshot_counts(sim)
+    branch.apply(sim)
+    started = time.perf_counter()
+    sim.run(max_time=max_time)
+    row = {key: value for key, value in asdict(branch).items() if key != 'economy'}
+    row['economy'] = branch.economy is not None
+    row.update(branch_metrics(sim, start))
+    row['seconds'] = time.perf_counter() - started
+    return row
+
+
+# The burn-in a forked worker inherits; set only in the parent around the pool.
+_burn_in: Optional[Simulation] = None
+
+
+def _forked_branch(args):
+    # Worker side under 'fork': this process is a fresh copy-on-write image
+    # of the parent, so _burn_in is untouched.
+    branch, max_time = args
+    return run_branch(_burn_in, branch, max_time)
+
+
+def _loaded_branch(args):
+    # Worker side otherwise: restore the snapshot file.
+    checkpoint_path, branch, max_time = args
+    return run_branch(Simulation.load_checkpoint(checkpoint_path), branch, max_time)
+
+
+def run_sweep(
+    sim: Simulation,
+    branches: List[Branch],
+    years: float,
+    workers: Optional[int] = None,
+    checkpoint_path: Optional[str] = None
+) -> List[Dict[str, object]]:
+    """
+    Snapshot sim (the finished burn-in) to checkpoint_path (a temporary file
+    if None) and run every branch from it for years. Returns one row per
+    branch, in order. sim itself is not advanced, but with workers <= 1 the
+    branches share this process's event counter: to continue sim itself
+    afterwards, reload it from a kept checkpoint_path.
+    """
+    global _burn_in
+    max_time = sim.time + years * 365
+    if workers is None:
+        workers = os.cpu_count() or 1
+    temporary = checkpoint_path is None
+    if temporary:
+        fd, checkpoint_path = tempfile.mkstemp(suffix='.ckpt')
+        os.close(fd)
+    sim.save_checkpoint(checkpoint_path)
+    try:
+        if workers <= 1:
+            return [_loaded_branch((checkpoint_path, branch, max_time)) for branch in branches]
+        if 'fork' in multiprocessing.get_all_start_methods():
+            # A new worker per branch (maxtasksperchild=1), each forked from
+            # this process while it still holds the untouched burn-in.
+            _burn_in = sim
+            try:
+                with multiprocessing.get_context('fork').Pool(workers, maxtasksperchild=1) as pool:
+                    return pool.map(_forked_branch, [(branch, max_time) for branch in branches], chunksize=1)
+            finally:
+                _burn_in = None
+        with ProcessPoolExecutor(workers) as pool:
+            return list(pool.map(_loaded_branch, [(checkpoint_path, branch, max_time) for branch in branches]))
+    finally:
+        if temporary:
+            os.remove(checkpoint_path)
+
+
+def format_table(rows: List[Dict[str, object]]) -> str:
+    """Rows as an aligned text table, one line per branch; columns in first-seen order."""
+    columns = []
+    for row in rows:
+        columns.extend(key for key in row if key not in columns)
+
+    def cell(value):
+        if value is None:
+            return '-'
+        if isinstance(value, float):
+            return f'{value:.3f}'
+        return str(value)
+
+    cells = [[cell(row.get(key)) for key in columns] for row in rows]
+    widths = [max([len(key)] + [len(line[i]) for line in cells]) for i, key in enumerate(columns)]
+    lines = ['  '.join(key.rjust(width) for key, width in zip(columns, widths))]
+    lines += ['  '.join(value.rjust(width) for value, width in zip(line, widths)) for line in cells]
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    config_path = sys.argv[1] if len(sys.argv) > 1 else "economy_config.json"
+    burn_in_years = float(sys.argv[2]) if len(sys.argv) > 2 else 100
+    branch_years = float(sys.argv[3]) if len(sys.argv) > 3 else 100
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    started = time.perf_counter()
+    sim = burn_in(config_path, burn_in_years)
+    print(f"Burn-in: {burn_in_years:g} years, {sim.alive_population_count} alive "
+          f"({time.perf_counter() - started:.2f}s)")
+
+    branches = [Branch('baseline')]
+    branches += [Branch(f'birth={p}', birth_prob=p) for p in (0.28, 0.36)]
+    branches += [Branch(f'infant={p}', infant_mortality=p) for p in (0.15, 0.35)]
+    branches += [Branch(f'k={k}', k_conversion_factor=k) for k in (0.1, 0.4)]
+    branches += [Branch('food=80', economy={'consumption': {'food': 80.0}})]
+
+    started = time.perf_counter()
+    rows = run_sweep(sim, branches, branch_years, workers)
+    print(f"{len(branches)} branches of {branch_years:g} years ({time.perf_counter() - started:.2f}s)\n")
+    print(format_table(rows))